@@ -1,6 +1,6 @@
 import chromadb
 
-# vector_store 폴더의 ChromaDB 확인
+# vector_store 폴더의 ChromaDB 상태 및 컬렉션 샘플 확인
 try:
     client = chromadb.PersistentClient(path="./vector_store")
     collections = client.list_collections()
@@ -9,14 +9,24 @@ try:
     print(f"DB 경로: ./vector_store")
     print(f"발견된 컬렉션 수: {len(collections)}")
     
-    if collections:
-        print("\n컬렉션 목록:")
-        for collection in collections:
-            print(f"- 이름: {collection.name}")
-            print(f"- 문서 수: {collection.count()}")
-            print()
-    else:
+    if not collections:
         print("컬렉션이 없습니다!")
+    
+    for i, collection in enumerate(collections):
+        print(f"\n컬렉션 {i+1}:")
+        print(f"  - 이름: '{collection.name}'")
+        print(f"  - 문서 수: {collection.count()}")
         
+        # 첫 번째 문서 샘플 확인 (peek 결과로 비어있는지 판단)
+        sample = collection.peek(limit=1)
+        if sample['ids']:
+            print(f"  - 샘플 ID: {sample['ids'][0]}")
+            if sample.get('metadatas') and sample['metadatas'][0]:
+                print(f"  - 샘플 메타데이터: {sample['metadatas'][0]}")
+            if sample.get('documents') and sample['documents'][0]:
+                print(f"  - 샘플 문서: {sample['documents'][0][:100]}...")
+                
 except Exception as e:
-    print(f"오류: {e}")
\ No newline at end of file
+    print(f"오류 발생: {e}")
+    import traceback
+    traceback.print_exc()
@@ -1,28 +1,139 @@
-import json
+import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
 import chromadb
+import numpy as np
+import orjson
+import torch
 from sentence_transformers import SentenceTransformer
 from pathlib import Path
 
-def normalize_data(item, item_type):
-    """JSON 데이터를 정규화된 형식으로 변환"""
-    tags = item.get("태그", "")
-    if tags is None:
-        tags = ""
+# 임베딩 모델 (384차원)
+EMBEDDING_MODEL_NAME = "snunlp/KR-SBERT-V40K-klueNLI-augSTS"
+
+# ONNX 변환 모델 경로 (1회 변환: optimum-cli export onnx --model snunlp/KR-SBERT-V40K-klueNLI-augSTS ./kr_sbert_onnx)
+ONNX_MODEL_DIR = Path("./kr_sbert_onnx")
+
+# GPU 사용 가능 시 큰 배치 + FP16, 아니면 CPU 배치
+DEVICE = "cuda" if torch.cuda.is_available() else "cpu"
+ENCODE_BATCH_SIZE = 256 if DEVICE == "cuda" else 128
+
+# CPU 또는 GPU 여러 장이면 멀티 프로세스로 인코딩 분산
+USE_MULTI_PROCESS = DEVICE == "cpu" or torch.cuda.device_count() > 1
+ENCODE_CHUNK_SIZE = 5000
+
+# ChromaDB 삽입 설정 (호출당 오버헤드가 커서 큰 배치를 병렬로 삽입)
+INSERT_BATCH_SIZE = 5000
+INSERT_WORKERS = 4
+
+# 정규화된 임베딩은 FP16으로도 정밀도 손실이 거의 없어 메모리 절반으로 보관
+EMBEDDING_DTYPE = np.float16
+EMBEDDINGS_PATH = "./embeddings.npy"
+
+# HNSW 인덱스 설정 (384차원, 약 1만 건 규모에 맞춰 기본값 M=16/construction_ef=100보다 가볍게)
+HNSW_CONFIG = {
+    "hnsw:space": "cosine",
+    "hnsw:M": 12,
+    "hnsw:construction_ef": 80,
+    "hnsw:search_ef": 64
+}
+
+# 원본 데이터 파일 → 장소 유형
+DATA_FILES = {
+    "visitjeju_food.json": "음식",
+    "visitjeju_tour.json": "관광",
+    "visitjeju_hotel.json": "숙소",
+    "visitjeju_event.json": "행사"
+}
+
+# 임베딩할 문서 본문 템플릿
+CONTENT_TEMPLATE = "{title}은(는) {address}에 위치한 {item_type} 장소입니다. {desc} 관련 태그: {tags}"
+DEFAULT_ADDRESS = sys.intern("제주도")
+
+def normalize_data(items, item_type):
+    """JSON 데이터 목록을 정규화된 형식으로 일괄 변환"""
+    item_type = sys.intern(item_type)
+    id_suffix = "_" + item_type
+    
+    documents = []
+    for item in items:
+        title = item.get("이름", "")
+        address = item.get("주소", DEFAULT_ADDRESS)
+        desc = item.get("소개", "")
+        tags = item.get("태그") or ""
         
-    return {
-        "id": str(item.get("id", item.get("이름", ""))) + "_" + item_type,
-        "type": item_type,
-        "title": item.get("이름", ""),
-        "address": item.get("주소", "제주도"),
-        "desc": item.get("소개", ""),
-        "tags": tags.replace("#", "").replace(" ", "").split(",") if tags else [],
-        "content": f"{item.get('이름', '')}은(는) {item.get('주소', '제주도')}에 위치한 {item_type} 장소입니다. {item.get('소개', '')} 관련 태그: {tags}"
-    }
+        documents.append({
+            "id": str(item.get("id", title)) + id_suffix,
+            "type": item_type,
+            "title": title,
+            "address": address,
+            "desc": desc,
+            "tags": tags.replace("#", "").replace(" ", "").split(",") if tags else [],
+            "content": CONTENT_TEMPLATE.format(
+                title=title, address=address, item_type=item_type, desc=desc, tags=tags
+            )
+        })
+    return documents
+
+def encode_texts(embedding_model, texts):
+    """텍스트 임베딩 생성 (멀티 프로세스 또는 단일 GPU 배치 인코딩)"""
+    if USE_MULTI_PROCESS:
+        pool = embedding_model.start_multi_process_pool()
+        try:
+            return embedding_model.encode_multi_process(
+                texts,
+                pool,
+                batch_size=ENCODE_BATCH_SIZE,
+                chunk_size=ENCODE_CHUNK_SIZE,
+                normalize_embeddings=True
+            )
+        finally:
+            embedding_model.stop_multi_process_pool(pool)
+    
+    with torch.inference_mode():
+        return embedding_model.encode(
+            texts,
+            batch_size=ENCODE_BATCH_SIZE,
+            show_progress_bar=True,
+            convert_to_numpy=True,
+            normalize_embeddings=True
+        )
+
+def load_onnx_model():
+    """ONNX 변환 모델이 있으면 onnxruntime(CPU)으로 로드, 없으면 None"""
+    if not ONNX_MODEL_DIR.exists():
+        return None
+    try:
+        from optimum.onnxruntime import ORTModelForFeatureExtraction
+        from transformers import AutoTokenizer
+    except ImportError:
+        print("⚠️ optimum[onnxruntime]이 설치되지 않아 PyTorch 모델을 사용합니다.")
+        return None
+    
+    model = ORTModelForFeatureExtraction.from_pretrained(ONNX_MODEL_DIR, provider="CPUExecutionProvider")
+    tokenizer = AutoTokenizer.from_pretrained(ONNX_MODEL_DIR)
+    return model, tokenizer
+
+def encode_texts_onnx(onnx_model, texts):
+    """onnxruntime 배치 인코딩 (SentenceTransformer와 동일한 mean pooling + 정규화)"""
+    model, tokenizer = onnx_model
+    batches = []
+    for start in range(0, len(texts), ENCODE_BATCH_SIZE):
+        inputs = tokenizer(
+            texts[start:start + ENCODE_BATCH_SIZE],
+            padding=True,
+            truncation=True,
+            return_tensors="np"
+        )
+        token_embeddings = model(**inputs).last_hidden_state
+        mask = inputs["attention_mask"][..., None].astype(token_embeddings.dtype)
+        pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        batches.append(pooled / np.linalg.norm(pooled, axis=1, keepdims=True))
+    return np.concatenate(batches)
 
 def load_json_file(file_path):
     """JSON 파일을 로드"""
-    with open(file_path, "r", encoding="utf-8") as f:
-        return json.load(f)
+    return orjson.loads(Path(file_path).read_bytes())
 
 def create_vector_db():
     """새로운 벡터 DB 생성 (384차원 임베딩 사용)"""
@@ -32,14 +143,24 @@ def create_vector_db():
     # 1. 데이터 로딩
     print("📁 JSON 데이터를 로딩합니다...")
     try:
-        food_data = [normalize_data(x, "음식") for x in load_json_file("visitjeju_food.json")]
-        tour_data = [normalize_data(x, "관광") for x in load_json_file("visitjeju_tour.json")]
-        hotel_data = [normalize_data(x, "숙소") for x in load_json_file("visitjeju_hotel.json")]
-        event_data = [normalize_data(x, "행사") for x in load_json_file("visitjeju_event.json")]
+        # 네 파일은 서로 독립적이므로 스레드로 동시에 읽고 정규화
+        with ThreadPoolExecutor(max_workers=len(DATA_FILES)) as executor:
+            raw_data = executor.map(load_json_file, DATA_FILES.keys())
+            normalized = executor.map(normalize_data, raw_data, DATA_FILES.values())
+            all_documents = [doc for documents in normalized for doc in documents]
         
-        all_documents = food_data + tour_data + hotel_data + event_data
         print(f"✅ 총 {len(all_documents)}개의 문서를 로드했습니다.")
         
+        # 중복 제거 (임베딩 전에 수행하여 불필요한 인코딩 방지)
+        seen_ids = set()
+        unique_documents = []
+        for doc in all_documents:
+            if doc["id"] not in seen_ids:
+                seen_ids.add(doc["id"])
+                unique_documents.append(doc)
+        
+        print(f"중복 제거 후 {len(unique_documents)}개 문서")
+        
     except FileNotFoundError as e:
         print(f"❌ 파일을 찾을 수 없습니다: {e}")
         return False
@@ -50,8 +171,15 @@ def create_vector_db():
     # 2. 임베딩 모델 로드 (384차원)
     print("🤖 임베딩 모델을 로드합니다...")
     try:
-        embedding_model = SentenceTransformer("snunlp/KR-SBERT-V40K-klueNLI-augSTS")
-        print("✅ 임베딩 모델 로드 완료")
+        # CPU 환경에서는 ONNX 변환 모델을 우선 사용
+        onnx_model = load_onnx_model() if DEVICE == "cpu" else None
+        if onnx_model:
+            print("✅ ONNX 임베딩 모델 로드 완료 (onnxruntime CPU)")
+        else:
+            embedding_model = SentenceTransformer(EMBEDDING_MODEL_NAME, device=DEVICE)
+            if DEVICE == "cuda":
+                embedding_model.half()  # FP16 추론
+            print(f"✅ 임베딩 모델 로드 완료 (device: {DEVICE})")
     except Exception as e:
         print(f"❌ 임베딩 모델 로드 실패: {e}")
         return False
@@ -59,8 +187,15 @@ def create_vector_db():
     # 3. 텍스트 임베딩 생성
     print("🔢 텍스트 임베딩을 생성합니다...")
     try:
-        texts = [doc["content"] for doc in all_documents]
-        embeddings = embedding_model.encode(texts, show_progress_bar=True)
+        texts = [doc["content"] for doc in unique_documents]
+        if onnx_model:
+            embeddings = encode_texts_onnx(onnx_model, texts)
+        else:
+            embeddings = encode_texts(embedding_model, texts)
+        
+        # 연속 배열로 디스크에 저장한 뒤 mmap으로 열어 배치별 슬라이스를 복사 없이 전달
+        np.save(EMBEDDINGS_PATH, embeddings.astype(EMBEDDING_DTYPE))
+        embeddings = np.load(EMBEDDINGS_PATH, mmap_mode="r")
         print(f"✅ {len(embeddings)}개의 임베딩 생성 완료")
     except Exception as e:
         print(f"❌ 임베딩 생성 실패: {e}")
@@ -85,7 +220,10 @@ def create_vector_db():
         # 새 컬렉션 생성
         collection = client.create_collection(
             name=collection_name,
-            metadata={"description": "제주도 여행 정보 (384차원 임베딩)"}
+            metadata={
+                "description": "제주도 여행 정보 (384차원 임베딩)",
+                **HNSW_CONFIG
+            }
         )
         
         print(f"✅ 컬렉션 '{collection_name}' 생성 완료")
@@ -97,41 +235,34 @@ def create_vector_db():
     # 5. 데이터 저장
     print("📝 데이터를 저장합니다...")
     try:
-        # 중복 제거
-        unique_ids = []
-        unique_texts = []
-        unique_embeddings = []
-        unique_metadatas = []
-        seen_ids = set()
-        
-        for i, doc in enumerate(all_documents):
-            doc_id = doc["id"]
-            if doc_id not in seen_ids:
-                seen_ids.add(doc_id)
-                unique_ids.append(doc_id)
-                unique_texts.append(texts[i])
-                unique_embeddings.append(embeddings[i].tolist())
-                unique_metadatas.append({
-                    "type": doc["type"],
-                    "title": doc["title"],
-                    "address": doc["address"]
-                })
+        unique_ids = [doc["id"] for doc in unique_documents]
+        unique_metadatas = [
+            {
+                "type": doc["type"],
+                "title": doc["title"],
+                "address": doc["address"]
+            }
+            for doc in unique_documents
+        ]
         
-        print(f"중복 제거 후 {len(unique_ids)}개 문서")
-        
-        # 배치로 저장
-        batch_size = 1000
-        for i in range(0, len(unique_ids), batch_size):
-            end_idx = min(i + batch_size, len(unique_ids))
-            
+        # 배치로 저장 (여러 배치를 워커 스레드에서 동시에 삽입)
+        # 원문은 RAG 서버가 검색 결과의 content로 돌려주므로 임베딩과 함께 저장
+        def add_batch(start, end):
             collection.add(
-                documents=unique_texts[i:end_idx],
-                embeddings=unique_embeddings[i:end_idx],
-                metadatas=unique_metadatas[i:end_idx],
-                ids=unique_ids[i:end_idx]
+                documents=texts[start:end],
+                embeddings=embeddings[start:end],
+                metadatas=unique_metadatas[start:end],
+                ids=unique_ids[start:end]
             )
-            
-            print(f"저장 진행: {end_idx}/{len(unique_ids)}")
+            return end
+        
+        with ThreadPoolExecutor(max_workers=INSERT_WORKERS) as executor:
+            futures = [
+                executor.submit(add_batch, i, min(i + INSERT_BATCH_SIZE, len(unique_ids)))
+                for i in range(0, len(unique_ids), INSERT_BATCH_SIZE)
+            ]
+            for future in as_completed(futures):
+                print(f"저장 진행: {future.result()}/{len(unique_ids)}")
         
         print(f"✅ 모든 데이터 저장 완료!")
         
@@ -148,8 +279,7 @@ def create_vector_db():
         )
         
         print("테스트 결과:")
-        for i, doc in enumerate(test_results["documents"][0]):
-            meta = test_results["metadatas"][0][i]
+        for i, meta in enumerate(test_results["metadatas"][0]):
             print(f"  {i+1}. {meta.get('title')} ({meta.get('type')})")
             
     except Exception as e:
@@ -11,9 +11,10 @@ import asyncio
 import uvicorn
 from demo_personalized_chatbot import (
     PersonalizedJejuChatbot,
-    PersonalizedUserProfile, 
     PersonalizedGraphState,
-    USER_DATA
+    EMPTY_PROFILE,
+    USER_DATA,
+    RAG_CLIENT
 )
 
 app = FastAPI(title="Demo Personalized Jeju Chatbot", version="1.0.0")
@@ -44,6 +45,11 @@ chatbot = PersonalizedJejuChatbot()
 # 세션별 상태 저장
 sessions: Dict[str, Dict] = {}
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """서버 종료 시 공유 벡터 검색 클라이언트 정리"""
+    await RAG_CLIENT.aclose()
+
 @app.get("/")
 async def root():
     """서버 상태 확인"""
@@ -130,14 +136,16 @@ async def set_user_endpoint(request: dict):
         if session_id not in sessions:
             sessions[session_id] = {
                 "conversation_history": [],
-                "user_profile": PersonalizedUserProfile()
+                "user_profile": EMPTY_PROFILE
             }
         
         # 사용자 정보 설정
         user_info = USER_DATA[user_name]
-        sessions[session_id]["user_profile"].name = user_name
-        sessions[session_id]["user_profile"].personality = user_info["personality"]
-        sessions[session_id]["user_profile"].travel_style = user_info["travel_style"]
+        sessions[session_id]["user_profile"] = sessions[session_id]["user_profile"].update(
+            name=user_name,
+            personality=user_info["personality"],
+            travel_style=user_info["travel_style"]
+        )
         
         return {
             "message": f"{user_name}님으로 설정되었습니다!",
@@ -8,12 +8,24 @@
 import asyncio
 import httpx
 import json
-from typing import Dict, List, Optional, TypedDict, Annotated
-from dataclasses import dataclass, asdict
+import orjson
+import re
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple, TypedDict, Annotated
+from dataclasses import dataclass, asdict, field, replace
 from datetime import datetime
+from langchain_core.messages import HumanMessage, SystemMessage
 from langchain_upstage import ChatUpstage
 from langgraph.graph import StateGraph, END
 from langgraph.checkpoint.memory import MemorySaver
+from pydantic import BaseModel, Field
+
+try:
+    import numpy as np
+    import torch
+    from sentence_transformers import SentenceTransformer
+except ImportError:
+    SentenceTransformer = None
 
 import os
 from dotenv import load_dotenv
@@ -37,28 +49,50 @@ def load_user_data():
 
 USER_DATA = load_user_data()
 
-@dataclass
+# 사용자 이름 매칭 정규식 (긴 이름을 먼저 시도해 부분 이름보다 전체 이름이 우선 매칭)
+NAME_RE = re.compile(
+    "|".join(re.escape(name) for name in sorted(USER_DATA, key=len, reverse=True))
+) if USER_DATA else None
+
+@dataclass(frozen=True, slots=True)
 class PersonalizedUserProfile:
-    """개인화된 사용자 프로필 정보"""
+    """개인화된 사용자 프로필 정보 (불변 - 변경은 update()로 새 객체 생성)"""
     name: Optional[str] = None
     personality: Optional[str] = None  # 에겐남, 에겐녀, 테토남, 테토녀
     travel_style: Optional[str] = None
     travel_dates: Optional[str] = None
     duration: Optional[str] = None  
     group_type: Optional[str] = None
-    interests: List[str] = None
+    interests: Tuple[str, ...] = ()
     budget: Optional[str] = None
     travel_region: Optional[str] = None
+    # 요약/충분성 판단 캐시 (update()로 만든 새 프로필에서는 비어 있음)
+    _summary_cache: Optional[str] = field(default=None, repr=False, compare=False)
+    _sufficient_cache: Optional[bool] = field(default=None, repr=False, compare=False)
     
     def __post_init__(self):
-        if self.interests is None:
-            self.interests = []
+        # 리스트로 들어온 관심사도 튜플로 보관
+        if not isinstance(self.interests, tuple):
+            object.__setattr__(self, "interests", tuple(self.interests or ()))
+    
+    def __deepcopy__(self, memo):
+        # 불변 객체이므로 상태 복사 시 그대로 공유
+        return self
+    
+    def update(self, **changes) -> "PersonalizedUserProfile":
+        """필드를 바꾼 새 프로필 반환 (캐시는 새로 계산)"""
+        return replace(self, _summary_cache=None, _sufficient_cache=None, **changes)
     
     def to_dict(self):
-        return asdict(self)
+        data = asdict(self)
+        del data["_summary_cache"], data["_sufficient_cache"]
+        return data
     
     def get_summary(self) -> str:
         """프로필 요약 텍스트 생성"""
+        if self._summary_cache is not None:
+            return self._summary_cache
+        
         summary_parts = []
         if self.name:
             summary_parts.append(f"이름: {self.name}")
@@ -79,10 +113,14 @@ class PersonalizedUserProfile:
         if self.travel_region:
             summary_parts.append(f"여행지역: {self.travel_region}")
         
-        return " | ".join(summary_parts) if summary_parts else "정보 없음"
+        object.__setattr__(self, "_summary_cache", " | ".join(summary_parts) if summary_parts else "정보 없음")
+        return self._summary_cache
     
     def is_sufficient(self) -> bool:
         """프로필이 여행 계획을 위해 충분한지 판단 - 간단하게 3개 정보만 있으면 OK"""
+        if self._sufficient_cache is not None:
+            return self._sufficient_cache
+        
         # 모든 가능한 정보들
         all_fields = [
             self.duration,       # 여행 기간
@@ -96,20 +134,25 @@ class PersonalizedUserProfile:
         
         # 정보가 3개 이상 있으면 충분
         filled_count = sum(1 for field in all_fields if field)
-        return filled_count >= 3
+        object.__setattr__(self, "_sufficient_cache", filled_count >= 3)
+        return self._sufficient_cache
+
+# 빈 프로필 기본값 (불변이므로 모든 세션이 하나를 공유)
+EMPTY_PROFILE = PersonalizedUserProfile()
 
 # LangGraph State 정의  
 class PersonalizedGraphState(TypedDict):
     """개인화된 그래프 상태"""
     user_message: Annotated[str, lambda x, y: y or x]  # 새 값이 있으면 새 값 사용, 없으면 기존 값 유지
-    conversation_history: List[Dict]
+    conversation_history: List[Dict]  # 최근 MAX_HISTORY_LENGTH개만 유지되는 대화 기록
     user_profile: PersonalizedUserProfile
-    hotel_results: List[Dict]
-    travel_results: List[Dict] 
-    food_results: List[Dict]
-    event_results: List[Dict]
+    hotel_results: Tuple[Dict, ...]  # 검색 결과 요약 ({name, description}), 불변 튜플로 공유
+    travel_results: Tuple[Dict, ...]
+    food_results: Tuple[Dict, ...]
+    event_results: Tuple[Dict, ...]
     final_response: str
     profile_ready: bool
+    search_flags: set  # 이번 메시지에서 검색 의도가 있는 카테고리 (수집 노드에서 한 번 계산)
 
 # 성향별 말투 정의
 PERSONALITY_STYLES = {
@@ -135,65 +178,207 @@ PERSONALITY_STYLES = {
     }
 }
 
-# 공용 LLM 인스턴스들
-profile_llm = ChatUpstage(api_key=UPSTAGE_API_KEY, model="solar-pro")
-hotel_llm = ChatUpstage(api_key=UPSTAGE_API_KEY, model="solar-pro")
-travel_llm = ChatUpstage(api_key=UPSTAGE_API_KEY, model="solar-pro")
-food_llm = ChatUpstage(api_key=UPSTAGE_API_KEY, model="solar-pro")
-event_llm = ChatUpstage(api_key=UPSTAGE_API_KEY, model="solar-pro")
-response_llm = ChatUpstage(api_key=UPSTAGE_API_KEY, model="solar-pro")
+# 성향별 프롬프트 블록 (매 호출마다 조립하지 않도록 모듈 로드 시 한 번만 생성)
+PERSONALITY_PROMPT_BLOCKS = {
+    personality: f"""성향 특징:
+- {style['characteristics']}
+- {style['tone']}
+- 예시 표현: {', '.join(style['example_phrases'])}"""
+    for personality, style in PERSONALITY_STYLES.items()
+}
+
+# 정보 수집 응답용 성향 블록
+PERSONALITY_COLLECTION_BLOCKS = {
+    personality: f"""
+당신은 {personality} 성향입니다:
+- {style['tone']}로 대화하세요.
+- {style['characteristics']}을 사용하세요.
+"""
+    for personality, style in PERSONALITY_STYLES.items()
+}
+
+# 최종 일정 응답용 성향 블록 (핵심 표현 2개만 사용)
+PERSONALITY_RESPONSE_BLOCKS = {
+    personality: f"""
+🎭 **{personality} 성향 필수 적용!**
+
+**말투**: {style['tone']}
+**핵심 표현**: {', '.join(style['example_phrases'][:2])}
+
+{"**에겐**: 따뜻하고 자세한 설명, 감정 표현 풍부" if personality in ["에겐남", "에겐녀"] else "**테토**: 간결하고 직설적, 핵심만 간단히"}
+"""
+    for personality, style in PERSONALITY_STYLES.items()
+}
+
+# 공용 LLM 인스턴스 (모든 노드가 하나의 클라이언트와 커넥션 풀을 공유)
+shared_llm = ChatUpstage(api_key=UPSTAGE_API_KEY, model="solar-pro")
 
 # 벡터 DB 접근 URL
 RAG_URL = "http://localhost:8002/chat"
 
+# 모든 벡터 검색이 공유하는 HTTP 클라이언트 (keep-alive로 커넥션 재사용, 종료 시 aclose)
+RAG_CLIENT = httpx.AsyncClient(
+    timeout=httpx.Timeout(connect=10.0, read=90.0, write=10.0, pool=10.0),
+    limits=httpx.Limits(max_keepalive_connections=8, max_connections=16)
+)
+
+class LRUCache:
+    """최대 개수를 넘으면 가장 오래 사용하지 않은 항목부터 버리는 간단한 LRU 캐시"""
+    
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+    
+    def get(self, key, default=None):
+        if key not in self._data:
+            return default
+        self._data.move_to_end(key)
+        return self._data[key]
+    
+    def set(self, key, value):
+        self._data[key] = value
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+# 프로필 추출 결과 캐시 ((메시지, 현재 프로필 요약) → 추출 결과)
+PROFILE_EXTRACTION_CACHE = LRUCache(maxsize=512)
+
+# 카테고리별 검색 쿼리 캐시 (프로필 요약 → QueryBundle)
+QUERY_CACHE = LRUCache(maxsize=1024)
+
+# 벡터 검색 결과 캐시 ((쿼리, 카테고리, 개수) → 검색 결과, 같은 쿼리는 임베딩/HTTP 모두 생략)
+SEARCH_RESULT_CACHE = LRUCache(maxsize=1024)
+
+# 의미 기반 검색 결과 캐시 설정 (벡터 DB와 같은 임베딩 모델, 코사인 유사도 임계값)
+SEMANTIC_CACHE_MODEL_NAME = "snunlp/KR-SBERT-V40K-klueNLI-augSTS"
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92"))
+SEMANTIC_CACHE_MAXSIZE = 1024
+
+class SemanticSearchCache:
+    """쿼리 임베딩이 충분히 비슷하면 이전 벡터 DB 검색 결과를 재사용하는 캐시"""
+    
+    def __init__(self, threshold: float, maxsize: int):
+        self.threshold = threshold
+        self.maxsize = maxsize
+        self._model = None
+        self._disabled = SentenceTransformer is None
+        self._load_lock = asyncio.Lock()
+        self._vectors = {}  # 카테고리 → 정규화된 쿼리 임베딩 행렬
+        self._sources = {}  # 카테고리 → 행별 검색 결과
+    
+    async def embed(self, queries: List[str]) -> list:
+        """쿼리 목록을 한 번의 forward pass로 임베딩 (모델은 첫 사용 시 한 번만 로드, 실패하면 캐시 비활성화)"""
+        if self._disabled:
+            return [None] * len(queries)
+        async with self._load_lock:
+            if self._model is None:
+                try:
+                    self._model = await asyncio.to_thread(self._load_model)
+                except Exception as e:
+                    print(f"⚠️ 의미 캐시 임베딩 모델 로드 실패 - 캐시 비활성화: {e}")
+                    self._disabled = True
+                    return [None] * len(queries)
+        return list(await asyncio.to_thread(self._encode, queries))
+    
+    @staticmethod
+    def _load_model():
+        """임베딩 모델 로드 (GPU가 있으면 FP16 추론)"""
+        device = "cuda" if torch.cuda.is_available() else "cpu"
+        model = SentenceTransformer(SEMANTIC_CACHE_MODEL_NAME, device=device)
+        if device == "cuda":
+            model.half()
+        print(f"✅ 의미 캐시 임베딩 모델 로드 완료 (device: {device})")
+        return model
+    
+    def _encode(self, queries: List[str]):
+        """한 턴의 쿼리를 한 배치로 인코딩 (autograd 추적 없이)"""
+        with torch.inference_mode():
+            return self._model.encode(
+                queries, batch_size=len(queries), convert_to_numpy=True, normalize_embeddings=True
+            )
+    
+    def lookup(self, vector, category: str, top_k: int) -> Optional[Tuple[Dict, ...]]:
+        """임베딩이 충분히 비슷한 이전 검색 결과 반환 (없으면 None)"""
+        vectors = self._vectors.get(category)
+        if vector is None or vectors is None:
+            return None
+        
+        scores = vectors @ vector
+        best = int(scores.argmax())
+        sources = self._sources[category][best]
+        if scores[best] >= self.threshold and len(sources) >= top_k:
+            print(f"⚡ 의미 캐시 적중 (유사도 {scores[best]:.3f})")
+            return sources[:top_k]
+        return None
+    
+    def add(self, category: str, vector, sources: Tuple[Dict, ...]):
+        if vector is None:
+            return
+        vectors = self._vectors.get(category)
+        if vectors is None:
+            self._vectors[category] = vector[None, :]
+            self._sources[category] = [sources]
+            return
+        # 최대 개수를 넘으면 가장 오래된 항목부터 제거
+        self._vectors[category] = np.vstack([vectors, vector])[-self.maxsize:]
+        self._sources[category] = (self._sources[category] + [sources])[-self.maxsize:]
+
+SEARCH_CACHE = SemanticSearchCache(SEMANTIC_CACHE_THRESHOLD, SEMANTIC_CACHE_MAXSIZE)
+
 def get_user_info_by_name(name: str) -> Dict:
     """이름으로 사용자 정보 조회"""
     return USER_DATA.get(name, {})
 
 def create_personality_prompt(personality: str, travel_style: str) -> str:
     """성향별 맞춤 프롬프트 생성"""
-    if personality not in PERSONALITY_STYLES:
+    if personality not in PERSONALITY_PROMPT_BLOCKS:
         return ""
     
-    style_info = PERSONALITY_STYLES[personality]
-    
     return f"""
 당신은 {personality} 성향의 제주도 여행 전문 상담사입니다.
 
-성향 특징:
-- {style_info['characteristics']}
-- {style_info['tone']}
-- 예시 표현: {', '.join(style_info['example_phrases'])}
+{PERSONALITY_PROMPT_BLOCKS[personality]}
 
 사용자의 여행 스타일: {travel_style}
 
 이 성향과 여행 스타일에 맞게 자연스럽게 대화하고, 여행 일정을 추천할 때는 반드시 사용자의 여행 스타일을 고려해주세요.
 """
 
+# 상태에 보관할 최대 대화 기록 수 (프롬프트에는 최근 3개만 사용)
+MAX_HISTORY_LENGTH = 20
+
+def append_history(conversation_history: List[Dict], role: str, message: str):
+    """대화 기록에 메시지를 추가하고 최근 MAX_HISTORY_LENGTH개만 유지"""
+    conversation_history.append({
+        "role": role,
+        "message": message,
+        "timestamp": datetime.now().isoformat()
+    })
+    del conversation_history[:-MAX_HISTORY_LENGTH]
+
 # 개인화된 프로필 수집 노드 (기존 로직 + 개인화)
 async def personalized_profile_collector_node(state: PersonalizedGraphState) -> PersonalizedGraphState:
     """개인화된 사용자 프로필 수집 및 업데이트 (기존 smart_chatbot.py 로직 사용)"""
     user_message = state["user_message"]
     conversation_history = state.get("conversation_history", [])
-    current_profile = state.get("user_profile", PersonalizedUserProfile())
+    current_profile = state.get("user_profile", EMPTY_PROFILE)
     
     # 대화 기록에 사용자 메시지 추가
-    conversation_history.append({
-        "role": "user", 
-        "message": user_message,
-        "timestamp": datetime.now().isoformat()
-    })
+    append_history(conversation_history, "user", user_message)
     
     # 이름 추출 시도 (개인화 부분)
-    if not current_profile.name:
-        for name in USER_DATA.keys():
-            if name in user_message:
-                user_info = get_user_info_by_name(name)
-                current_profile.name = name
-                current_profile.personality = user_info.get('personality')
-                current_profile.travel_style = user_info.get('travel_style')
-                print(f"🎯 개인화 정보 설정: {name} ({current_profile.personality}) - {current_profile.travel_style}")
-                break
+    if not current_profile.name and NAME_RE:
+        match = NAME_RE.search(user_message)
+        if match:
+            name = match.group(0)
+            user_info = get_user_info_by_name(name)
+            current_profile = current_profile.update(
+                name=name,
+                personality=user_info.get('personality'),
+                travel_style=user_info.get('travel_style')
+            )
+            print(f"🎯 개인화 정보 설정: {name} ({current_profile.personality}) - {current_profile.travel_style}")
     
     # 프로필 정보 추출 (기존 로직)
     profile_info = await extract_personalized_profile_info(user_message, current_profile)
@@ -206,50 +391,56 @@ async def personalized_profile_collector_node(state: PersonalizedGraphState) ->
     # 프로필이 충분한지 확인 (기존 로직)
     profile_ready = is_personalized_profile_sufficient(updated_profile)
     
+    # 카테고리별 검색 의도는 여기서 한 번만 계산해 라우팅 함수들이 공유
+    search_flags = classify_message(user_message)
+    
     if not profile_ready:
         # 추가 정보 수집 응답 생성 (개인화 적용)
         response = await generate_personalized_info_collection_response(updated_profile, user_message, conversation_history)
-        conversation_history.append({
-            "role": "assistant",
-            "message": response,
-            "timestamp": datetime.now().isoformat()
-        })
+        append_history(conversation_history, "assistant", response)
         
         return {
-            **state,
             "conversation_history": conversation_history,
             "user_profile": updated_profile,
             "final_response": response,
-            "profile_ready": False
+            "profile_ready": False,
+            "search_flags": search_flags
         }
     
     return {
-        **state,
         "conversation_history": conversation_history,
         "user_profile": updated_profile,
-        "profile_ready": True
+        "profile_ready": True,
+        "search_flags": search_flags
     }
 
+# 프로필 추출 구조화 출력 스키마 (언급되지 않은 정보는 null)
+class ExtractedProfile(BaseModel):
+    travel_dates: Optional[str] = Field(None, description="여행 날짜 (예: 8월 1일-3일, 다음주 금요일부터 등)")
+    duration: Optional[str] = Field(None, description="여행 기간 (예: 2박3일, 3일, 1주일 등)")
+    group_type: Optional[str] = Field(None, description="여행 유형 (예: 커플, 가족, 친구, 혼자 등)")
+    interests: List[str] = Field(default_factory=list, description="관심사 목록 (예: 액티비티, 맛집, 힐링, 사진촬영 등)")
+    budget: Optional[str] = Field(None, description="예산 정보")
+    travel_region: Optional[str] = Field(None, description="여행 지역 (제주시, 서귀포 등)")
+
+profile_extractor = shared_llm.with_structured_output(ExtractedProfile)
+
 # 개인화된 프로필 정보 추출 함수
 async def extract_personalized_profile_info(message: str, current_profile: PersonalizedUserProfile) -> Dict:
     """메시지에서 프로필 정보 추출 (기존 로직 + 개인화)"""
+    # 같은 프로필 상태에서 같은 메시지면 LLM 호출 없이 이전 추출 결과 재사용
+    cache_key = (message, current_profile.get_summary())
+    cached = PROFILE_EXTRACTION_CACHE.get(cache_key)
+    if cached is not None:
+        print("⚡ 프로필 추출 캐시 적중")
+        return cached
+    
     prompt = f"""다음 사용자 메시지에서 제주도 여행 관련 정보를 추출해주세요.
 
 사용자 메시지: {message}
 
 현재 프로필: {current_profile.get_summary()}
 
-다음 정보를 JSON 형태로 추출해주세요 (없으면 null):
-
-{{
-    "travel_dates": "여행 날짜 (예: 8월 1일-3일, 다음주 금요일부터 등)",
-    "duration": "여행 기간 (예: 2박3일, 3일, 1주일 등)", 
-    "group_type": "여행 유형 (예: 커플, 가족, 친구, 혼자 등)",
-    "interests": ["관심사 배열 (예: 액티비티, 맛집, 힐링, 사진촬영 등)"],
-    "budget": "예산 정보",
-    "travel_region": "여행 지역 (제주시, 서귀포 등)"
-}}
-
 추출 가이드:
 - "여자친구랑", "남친이랑", "연인과" → group_type: "커플"
 - "2박3일", "3박4일" → duration: 그대로 추출
@@ -260,39 +451,38 @@ async def extract_personalized_profile_info(message: str, current_profile: Perso
 명시적으로 언급된 정보만 추출해주세요."""
 
     try:
-        response = await profile_llm.ainvoke(prompt)
-        content = response.content.strip()
-        
-        if "```json" in content:
-            content = content.split("```json")[1].split("```")[0].strip()
-        elif "```" in content:
-            content = content.split("```")[1].strip()
-            
-        return json.loads(content)
+        extracted = await profile_extractor.ainvoke(prompt)
+        profile_info = extracted.model_dump()
+        PROFILE_EXTRACTION_CACHE.set(cache_key, profile_info)
+        return profile_info
         
     except Exception as e:
         print(f"❌ 개인화 프로필 추출 오류: {e}")
         return {}
 
+# 추출 결과를 그대로 덮어쓰는 프로필 필드
+PROFILE_DIRECT_FIELDS = ("travel_dates", "duration", "group_type", "budget", "travel_region")
+
 def update_personalized_profile(current_profile: PersonalizedUserProfile, profile_info: Dict) -> PersonalizedUserProfile:
-    """개인화된 프로필 업데이트"""
-    if profile_info.get("travel_dates"):
-        current_profile.travel_dates = profile_info["travel_dates"]
-    if profile_info.get("duration"):
-        current_profile.duration = profile_info["duration"]
-    if profile_info.get("group_type"):
-        current_profile.group_type = profile_info["group_type"]
-    if profile_info.get("interests"):
-        new_interests = profile_info["interests"]
-        for interest in new_interests:
-            if interest not in current_profile.interests:
-                current_profile.interests.append(interest)
-    if profile_info.get("budget"):
-        current_profile.budget = profile_info["budget"]
-    if profile_info.get("travel_region"):
-        current_profile.travel_region = profile_info["travel_region"]
+    """개인화된 프로필 업데이트 (바뀐 필드가 있을 때만 새 프로필 생성)"""
+    changes = {
+        field_name: profile_info[field_name]
+        for field_name in PROFILE_DIRECT_FIELDS
+        if profile_info.get(field_name)
+    }
     
-    return current_profile
+    if profile_info.get("interests"):
+        # 집합으로 중복 확인 (기존 순서 유지)
+        existing = set(current_profile.interests)
+        new_interests = []
+        for interest in profile_info["interests"]:
+            if interest not in existing:
+                existing.add(interest)
+                new_interests.append(interest)
+        if new_interests:
+            changes["interests"] = current_profile.interests + tuple(new_interests)
+    
+    return current_profile.update(**changes) if changes else current_profile
 
 def is_personalized_profile_sufficient(profile: PersonalizedUserProfile) -> bool:
     """개인화된 프로필이 충분한지 확인"""
@@ -307,12 +497,7 @@ async def generate_personalized_info_collection_response(profile: PersonalizedUs
     """개인화된 추가 정보 수집 응답 생성"""
     personality_context = ""
     if profile.personality and profile.travel_style:
-        style_info = PERSONALITY_STYLES.get(profile.personality, {})
-        personality_context = f"""
-당신은 {profile.personality} 성향입니다:
-- {style_info.get('tone', '자연스러운 말투')}로 대화하세요.
-- {style_info.get('characteristics', '친근하고 도움이 되는 표현')}을 사용하세요.
-"""
+        personality_context = PERSONALITY_COLLECTION_BLOCKS.get(profile.personality, "")
     
     prompt = f"""당신은 제주도 여행 상담사입니다.
 
@@ -327,15 +512,63 @@ async def generate_personalized_info_collection_response(profile: PersonalizedUs
 친근하고 자연스럽게 대화하면서 정보를 수집하세요."""
 
     try:
-        response = await profile_llm.ainvoke(prompt)
+        response = await shared_llm.ainvoke(prompt)
         return response.content.strip()
     except Exception as e:
         print(f"❌ 개인화 정보 수집 응답 생성 오류: {e}")
         return "여행 계획을 위해 몇 가지 정보가 더 필요해요. 언제, 며칠 정도 여행하실 예정인가요?"
 
+# 프롬프트에 넣을 장소 설명 최대 길이
+PROMPT_DESCRIPTION_LENGTH = 300
+
+def to_prompt_brief(source: Dict) -> Dict:
+    """검색 결과를 프롬프트에 필요한 이름/설명만 남긴 요약으로 변환"""
+    return {
+        "name": source.get("name", ""),
+        "description": str(source.get("content") or source.get("description") or "")[:PROMPT_DESCRIPTION_LENGTH]
+    }
+
 # 벡터 DB 검색 함수 (smart_chatbot.py와 동일)
-async def search_vector_db(query: str, category: str = "", top_k: int = 5) -> List[Dict]:
+async def search_vector_db(query: str, category: str = "", top_k: int = 5) -> Tuple[Dict, ...]:
     """벡터 DB 검색 (재시도 및 백오프 로직 포함) - smart_chatbot.py와 동일"""
+    return (await search_vector_db_batch([(query, category, top_k)]))[0]
+
+async def search_vector_db_batch(requests: List[tuple]) -> List[Tuple[Dict, ...]]:
+    """(쿼리, 카테고리, 개수) 목록을 한 번에 검색 - 캐시 확인 후 남은 쿼리만 일괄 임베딩하고 HTTP 요청"""
+    # 완전히 같은 쿼리는 임베딩 없이 바로 반환
+    results = [SEARCH_RESULT_CACHE.get(request) for request in requests]
+    for request, cached_sources in zip(requests, results):
+        if cached_sources is not None:
+            print(f"⚡ 검색 결과 캐시 적중 - {request[1]}")
+    
+    misses = [i for i, cached_sources in enumerate(results) if cached_sources is None]
+    if not misses:
+        return results
+    
+    # 남은 쿼리 임베딩을 한 번에 계산하고, 비슷한 쿼리로 이미 검색한 적이 있으면 HTTP 요청 생략
+    vectors = await SEARCH_CACHE.embed([requests[i][0] for i in misses])
+    pending = []
+    for i, query_vector in zip(misses, vectors):
+        query, category, top_k = requests[i]
+        cached_sources = SEARCH_CACHE.lookup(query_vector, category, top_k)
+        if cached_sources is not None:
+            SEARCH_RESULT_CACHE.set(requests[i], cached_sources)
+            results[i] = cached_sources
+        else:
+            pending.append((i, query_vector))
+    
+    # RAG 서버는 단건 API이므로 캐시로 해결되지 않은 쿼리만 병렬 요청
+    async with asyncio.TaskGroup() as task_group:
+        tasks = [
+            (i, task_group.create_task(fetch_vector_db(*requests[i], query_vector)))
+            for i, query_vector in pending
+        ]
+    for i, task in tasks:
+        results[i] = task.result()
+    return results
+
+async def fetch_vector_db(query: str, category: str, top_k: int, query_vector) -> Tuple[Dict, ...]:
+    """RAG 서버에 검색 요청 (재시도 및 백오프 로직 포함)"""
     max_retries = 3
     base_timeout = 90.0  # 대용량 요청을 위한 충분한 타임아웃
     
@@ -352,48 +585,58 @@ async def search_vector_db(query: str, category: str = "", top_k: int = 5) -> Li
             
             print(f"🔄 벡터 검색 시도 {attempt + 1}/{max_retries} - 타임아웃: {current_timeout}초")
             
-            async with httpx.AsyncClient(timeout=timeout_config) as client:
-                # 여행 기간에 맞는 동적 검색 개수
-                search_payload = {
-                    "query": query,
-                    "top_k": top_k,  # 여행 기간별 동적 개수
-                    "search_type": "mmr",  # 다양성을 고려한 MMR 검색
-                    "diversity_lambda": 0.5  # 유사성:다양성 = 50:50
-                }
+            # 여행 기간에 맞는 동적 검색 개수
+            search_payload = {
+                "query": query,
+                "top_k": top_k,  # 여행 기간별 동적 개수
+                "search_type": "mmr",  # 다양성을 고려한 MMR 검색
+                "diversity_lambda": 0.5  # 유사성:다양성 = 50:50
+            }
+            
+            response = await RAG_CLIENT.post(RAG_URL, json=search_payload, timeout=timeout_config)
+            
+            if response.status_code == 200:
+                result = orjson.loads(response.content)
+                # 검색 직후 프롬프트용 요약으로 변환 (상태와 캐시에는 요약만 보관)
+                sources = tuple(to_prompt_brief(source) for source in result.get("sources", []))
+                processing_time = result.get("processing_time", 0)
                 
-                response = await client.post(RAG_URL, json=search_payload)
+                print(f"✅ 검색 성공 - {len(sources)}개 결과, {processing_time:.2f}초 소요 (요청: {top_k}개)")
                 
-                if response.status_code == 200:
-                    result = response.json()
-                    sources = result.get("sources", [])
-                    processing_time = result.get("processing_time", 0)
-                    
-                    print(f"✅ 검색 성공 - {len(sources)}개 결과, {processing_time:.2f}초 소요 (요청: {top_k}개)")
-                    
-                    # sources와 answer 모두 확인 (간단 버전)
-                    if sources and len(sources) > 0:
-                        print(f"🧪 첫 번째 결과: {sources[0].get('content', '')[:100]}...")
-                    
-                    return sources[:top_k]  # 요청한 개수만큼 반환
+                # sources와 answer 모두 확인 (간단 버전)
+                if sources and len(sources) > 0:
+                    print(f"🧪 첫 번째 결과: {sources[0]['description'][:100]}...")
+                    SEARCH_CACHE.add(category, query_vector, sources)
+                    SEARCH_RESULT_CACHE.set((query, category, top_k), sources[:top_k])
+                
+                return sources[:top_k]  # 요청한 개수만큼 반환
+            else:
+                print(f"❌ HTTP 오류 - 상태코드: {response.status_code}")
+                # 4xx 등 서버 오류가 아닌 응답은 재시도해도 같으므로 바로 실패 처리
+                if not 500 <= response.status_code < 600:
+                    print("❌ 재시도 불가 응답 - 빈 결과 반환")
+                    return ()
+                if attempt < max_retries - 1:
+                    await asyncio.sleep(2 ** attempt)  # 지수 백오프
+                    continue
                 else:
-                    print(f"❌ HTTP 오류 - 상태코드: {response.status_code}")
-                    if attempt < max_retries - 1:
-                        await asyncio.sleep(2 ** attempt)  # 지수 백오프
-                        continue
-                    else:
-                        print(f"❌ 최대 재시도 횟수 초과 - 빈 결과 반환")
-                        return []
-                        
-        except Exception as e:
+                    print(f"❌ 최대 재시도 횟수 초과 - 빈 결과 반환")
+                    return ()
+                    
+        except httpx.TransportError as e:
+            # 타임아웃/연결 오류만 재시도
             print(f"❌ 벡터 검색 오류 (시도 {attempt + 1}): {e}")
             if attempt < max_retries - 1:
                 await asyncio.sleep(2 ** attempt)  # 지수 백오프
                 continue
             else:
                 print(f"❌ 최대 재시도 횟수 초과 - 빈 결과 반환")
-                return []
+                return ()
+        except Exception as e:
+            print(f"❌ 벡터 검색 오류 (재시도 불가): {e}")
+            return ()
     
-    return []
+    return ()
 
 # 숙박 에이전트 노드 (기존 로직 + 개인화)
 async def hotel_agent_node(state: PersonalizedGraphState) -> PersonalizedGraphState:
@@ -437,7 +680,7 @@ async def hotel_agent_node(state: PersonalizedGraphState) -> PersonalizedGraphSt
     
     try:
         # 쿼리 생성
-        response = await hotel_llm.ainvoke(prompt)
+        response = await shared_llm.ainvoke(prompt)
         search_query = response.content.strip()
         print(f"🏨 개인화 숙박 에이전트 쿼리: '{search_query}'")
         
@@ -447,14 +690,12 @@ async def hotel_agent_node(state: PersonalizedGraphState) -> PersonalizedGraphSt
         print(f"🏨 숙박 검색 결과 ({len(hotel_results)}개)")
         
         return {
-            **state,
             "hotel_results": hotel_results
         }
         
     except Exception as e:
         print(f"❌ 숙박 에이전트 오류: {e}")
         return {
-            **state,
             "hotel_results": []
         }
 
@@ -487,18 +728,18 @@ async def travel_agent_node(state: PersonalizedGraphState) -> PersonalizedGraphS
 검색 쿼리:"""
     
     try:
-        response = await travel_llm.ainvoke(prompt)
+        response = await shared_llm.ainvoke(prompt)
         search_query = response.content.strip()
         print(f"🗺️ 개인화 관광지 에이전트 쿼리: '{search_query}'")
         
         travel_results = await search_vector_db(search_query, "travel", top_k=8)
         print(f"🗺️ 관광지 검색 결과 ({len(travel_results)}개)")
         
-        return {**state, "travel_results": travel_results}
+        return {"travel_results": travel_results}
         
     except Exception as e:
         print(f"❌ 관광지 에이전트 오류: {e}")
-        return {**state, "travel_results": []}
+        return {"travel_results": []}
 
 # 음식 에이전트 노드 (기존 로직 + 개인화)
 async def food_agent_node(state: PersonalizedGraphState) -> PersonalizedGraphState:
@@ -529,18 +770,18 @@ async def food_agent_node(state: PersonalizedGraphState) -> PersonalizedGraphSta
 검색 쿼리:"""
     
     try:
-        response = await food_llm.ainvoke(prompt)
+        response = await shared_llm.ainvoke(prompt)
         search_query = response.content.strip()
         print(f"🍽️ 개인화 음식 에이전트 쿼리: '{search_query}'")
         
         food_results = await search_vector_db(search_query, "food", top_k=6)
         print(f"🍽️ 음식 검색 결과 ({len(food_results)}개)")
         
-        return {**state, "food_results": food_results}
+        return {"food_results": food_results}
         
     except Exception as e:
         print(f"❌ 음식 에이전트 오류: {e}")
-        return {**state, "food_results": []}
+        return {"food_results": []}
 
 # 이벤트 에이전트 노드 (기존 로직 + 개인화)
 async def event_agent_node(state: PersonalizedGraphState) -> PersonalizedGraphState:
@@ -571,23 +812,32 @@ async def event_agent_node(state: PersonalizedGraphState) -> PersonalizedGraphSt
 검색 쿼리:"""
     
     try:
-        response = await event_llm.ainvoke(prompt)
+        response = await shared_llm.ainvoke(prompt)
         search_query = response.content.strip()
         print(f"🎪 개인화 이벤트 에이전트 쿼리: '{search_query}'")
         
         event_results = await search_vector_db(search_query, "event", top_k=3)
         print(f"🎪 이벤트 검색 결과 ({len(event_results)}개)")
         
-        return {**state, "event_results": event_results}
+        return {"event_results": event_results}
         
     except Exception as e:
         print(f"❌ 이벤트 에이전트 오류: {e}")
-        return {**state, "event_results": []}
+        return {"event_results": []}
 
-# 개인화된 응답 생성 노드 (기존 로직 + 개인화 말투)
-# 개인화된 병렬 검색 노드 (smart_chatbot.py 기반)
-async def personalized_parallel_search_all(state: PersonalizedGraphState) -> PersonalizedGraphState:
-    """모든 카테고리를 병렬로 검색 (개인화 버전)"""
+# 카테고리별 검색 쿼리 묶음 (한 번의 LLM 호출로 네 쿼리를 함께 생성)
+class QueryBundle(BaseModel):
+    hotel: str = Field(description="숙박 검색 쿼리")
+    tour: str = Field(description="관광지 검색 쿼리")
+    food: str = Field(description="식당/카페 검색 쿼리")
+    event: str = Field(description="행사/축제 검색 쿼리")
+
+query_bundle_generator = shared_llm.with_structured_output(QueryBundle)
+
+# LLM 생성 쿼리 기반 병렬 검색 (smart_chatbot.py 기반)
+# 그래프에는 아래의 규칙 기반 personalized_parallel_search_all이 등록됨
+async def personalized_llm_query_search_all(state: PersonalizedGraphState) -> PersonalizedGraphState:
+    """LLM으로 카테고리별 쿼리를 생성한 뒤 모든 카테고리를 동시에 검색 (개인화 버전)"""
     user_profile = state["user_profile"]
     
     # 여행 기간에 따른 검색 개수 결정 (smart_chatbot.py와 동일)
@@ -606,68 +856,28 @@ async def personalized_parallel_search_all(state: PersonalizedGraphState) -> Per
         personality_info = PERSONALITY_STYLES.get(user_profile.personality, {})
         personality_context = f"\n사용자 성향: {user_profile.personality} - {personality_info.get('description', '')}\n여행 스타일: {user_profile.travel_style}\n"
     
-    # 각 카테고리별 개인화된 쿼리 생성
-    async def generate_personalized_hotel_query(profile):
-        base_prompt = f"""당신은 제주 여행자를 위한 **숙박 검색 쿼리 생성 전문가**입니다.
+    # 네 카테고리 쿼리를 한 번의 구조화 출력 호출로 생성 (프로필 요약이 같으면 캐시 재사용)
+    profile_summary = user_profile.get_summary()
+    query_bundle = QUERY_CACHE.get(profile_summary)
+    if query_bundle is None:
+        prompt = f"""당신은 제주관광 전문 **자연어 쿼리 생성 전문가**입니다.
 
-사용자 프로필 정보를 참고해, 사용자의 관심사, 여행 지역, 여행 기간 정보를 바탕으로 **벡터 DB에서 숙박을 검색하기 위한 자연어 검색 쿼리 문장 한 줄**을 생성해주세요.
+사용자 프로필: {profile_summary}{personality_context}
 
-사용자 프로필: {profile.get_summary()}{personality_context}
+사용자의 관심사, 여행 지역, 여행 기간, 동행자 정보를 참고해 **벡터 DB 검색용 자연어 검색 쿼리 문장**을 카테고리별로 한 줄씩 만들어주세요.
 
-쿼리에는 "제주도", "숙박", "호텔" 등 핵심 키워드를 포함하고 자연스럽고 간결해야 합니다.
-
-검색 쿼리:"""
-        
-        response = await hotel_llm.ainvoke(base_prompt)
-        return response.content.strip()
-    
-    async def generate_personalized_tour_query(profile):
-        base_prompt = f"""당신은 제주관광 전문 **자연어** **쿼리 생성 전문가**입니다.
-
-다음과 같은 사용자 프로필에서 사용자가 입력한 관심사, 여행 지역, 동행자 정보를 참고해서 **벡터 DB에서 관광지 정보를 검색하기 위한 자연어 검색 쿼리 문장 한 줄**을 만들어주세요.
-
-사용자 프로필: {profile.get_summary()}{personality_context}
-
-쿼리는 "제주도", "관광지" 등 핵심 키워드를 포함하고 자연스럽고 간결해야 합니다.
-
-검색 쿼리:"""
-        
-        response = await travel_llm.ainvoke(base_prompt)
-        return response.content.strip()
-    
-    async def generate_personalized_food_query(profile):
-        base_prompt = f"""당신은 제주관광 전문 **자연어 쿼리 생성 전문가**입니다.
-
-다음 사용자 프로필에서 사용자가 알려준 지역, 관심사, 그리고 동행자 정보를 참고해서 **벡터 DB에서 식당 또는 카페 정보를 검색하기 위한 자연어 검색 쿼리 문장 한 줄**을 만들어주세요
-
-사용자 프로필: {profile.get_summary()}{personality_context}
-
-쿼리는 "제주도", "맛집" 등 핵심 키워드를 포함하고 자연스럽고 간결해야 합니다.
+- hotel: 숙박 검색 쿼리 ("제주도", "숙박", "호텔" 등 핵심 키워드 포함)
+- tour: 관광지 검색 쿼리 ("제주도", "관광지" 등 핵심 키워드 포함)
+- food: 식당 또는 카페 검색 쿼리 ("제주도", "맛집" 등 핵심 키워드 포함)
+- event: 행사나 축제 검색 쿼리 ("제주도", "행사", "이벤트" 등 핵심 키워드 포함)
 
-검색 쿼리:"""
-        
-        response = await food_llm.ainvoke(base_prompt)
-        return response.content.strip()
+각 쿼리는 자연스럽고 간결해야 합니다."""
+        query_bundle = await query_bundle_generator.ainvoke(prompt)
+        QUERY_CACHE.set(profile_summary, query_bundle)
     
-    async def generate_personalized_event_query(profile):
-        base_prompt = f"""당신은 제주관광 전문 **자연어** **쿼리 생성 전문가**입니다.
-
-다음과 같은 사용자 프로필을 참고하여, 벡터 DB에서 행사나 축제 정보를 검색하기 위한 자연어 검색 쿼리 문장 한 줄을 만들어주세요.
-
-사용자 프로필: {profile.get_summary()}{personality_context}
-
-쿼리는 "제주도", "행사", "이벤트" 등 핵심 키워드를 포함하고 자연스럽고 간결해야 합니다.
-
-자연어 검색 쿼리 한 문장으로 출력해주세요:"""
-        
-        response = await event_llm.ainvoke(base_prompt)
-        return response.content.strip()
-    
-    # 모든 카테고리에 개인화된 쿼리 생성
-    hotel_query = await generate_personalized_hotel_query(user_profile)
-    tour_query = await generate_personalized_tour_query(user_profile)
-    food_query = await generate_personalized_food_query(user_profile)
-    event_query = await generate_personalized_event_query(user_profile)
+    hotel_query, tour_query, food_query, event_query = (
+        query_bundle.hotel, query_bundle.tour, query_bundle.food, query_bundle.event
+    )
     
     print(f"🎯 개인화된 맞춤형 쿼리들:")
     print(f"   🏨 숙박 쿼리: '{hotel_query}'")
@@ -675,41 +885,161 @@ async def personalized_parallel_search_all(state: PersonalizedGraphState) -> Per
     print(f"   🍽️ 음식 쿼리: '{food_query}'")
     print(f"   🎉 이벤트 쿼리: '{event_query}'")
     
-    # 순차 검색 (smart_chatbot.py와 동일)
-    print("🚀 순차 검색 시작...")
+    # 병렬 검색 (네 검색은 서로 독립적이므로 동시에 요청)
+    print("🚀 병렬 검색 시작...")
     
-    results = {}
     queries = [
         ("hotel", hotel_query, search_counts["hotel"]),
         ("tour", tour_query, search_counts["tour"]),
         ("food", food_query, search_counts["food"]),
         ("event", event_query, search_counts["event"])
     ]
-    
     for category, query, count in queries:
         print(f"📝 {category} 쿼리: '{query}' (검색 개수: {count}개)")
-        
-        try:
-            result = await search_vector_db(query, category, count)
-            results[category] = result
-            print(f"🎯 {category} 완료: {len(result)}개 결과")
-        except Exception as e:
-            print(f"❌ {category} 검색 실패: {e}")
-            results[category] = []
-        
-        # 각 검색 사이에 잠깐 대기
-        await asyncio.sleep(1.0)
     
-    # 상태 업데이트
-    state["hotel_results"] = results.get("hotel", [])
-    state["travel_results"] = results.get("tour", [])
-    state["food_results"] = results.get("food", [])
-    state["event_results"] = results.get("event", [])
+    # 하나라도 실패하면 나머지 검색은 취소하고 모두 빈 결과로 처리
+    try:
+        async with asyncio.TaskGroup() as task_group:
+            tasks = {
+                category: task_group.create_task(search_vector_db(query, category, count))
+                for category, query, count in queries
+            }
+        results = {category: task.result() for category, task in tasks.items()}
+    except* Exception as error_group:
+        print(f"❌ 개인화 검색 실패: {error_group.exceptions}")
+        results = {category: [] for category, _, _ in queries}
+    
+    print(f"📊 개인화 검색 완료 - 호텔: {len(results['hotel'])}개, 관광: {len(results['tour'])}개, 음식: {len(results['food'])}개, 이벤트: {len(results['event'])}개")
     
-    print(f"📊 개인화 검색 완료 - 호텔: {len(state['hotel_results'])}개, 관광: {len(state['travel_results'])}개, 음식: {len(state['food_results'])}개, 이벤트: {len(state['event_results'])}개")
+    # 변경된 키만 반환 (LangGraph가 기존 상태에 병합)
+    return {
+        "hotel_results": results["hotel"],
+        "travel_results": results["tour"],
+        "food_results": results["food"],
+        "event_results": results["event"]
+    }
+
+# 일정 구조화 출력 스키마
+class Place(BaseModel):
+    name: str = Field(description="장소의 정확한 이름")
+    time: Optional[str] = Field(None, description="방문 시각 (예: 11시)")
+    description: Optional[str] = Field(None, description="장소 설명")
+
+class Day(BaseModel):
+    morning: List[Place] = Field(default_factory=list, description="오전 일정 (1~2곳)")
+    afternoon: List[Place] = Field(default_factory=list, description="오후 일정 (1~2곳)")
+    evening: List[Place] = Field(default_factory=list, description="저녁 일정 (1~2곳)")
+
+class Itinerary(BaseModel):
+    days: List[Day] = Field(description="일차별 일정")
+    closing: Optional[str] = Field(None, description="마무리 인사")
+
+itinerary_generator = shared_llm.with_structured_output(Itinerary)
+
+# 성향별 마무리 문장 (LLM 마무리 대신 항상 이 문장을 사용)
+PERSONALITY_CLOSINGS = {
+    "에겐남": "정말 좋은 여행이 될 것 같습니다. 혹시 더 궁금한 것이 있으시면 언제든 말씀해 주세요. 편안하고 즐거운 제주 여행 되시길 바랍니다! 😊",
+    "에겐녀": "와~ 정말 설레는 여행 계획이네요! 혹시 걱정되는 부분이나 더 알고 싶은 게 있으시면 언제든 말씀해 주세요. 힐링 가득한 제주 여행 되시길 진심으로 바라요! 💕✨",
+    "테토남": "이상. 더 필요한 정보 있으면 말해.",
+    "테토녀": "끝. 다른 거 필요하면 또 말해."
+}
+
+# 일정 시간대 (스키마 필드명, 표시 이름)
+TIME_SLOTS = (("morning", "오전"), ("afternoon", "오후"), ("evening", "저녁"))
+
+def render_itinerary(itinerary: Itinerary, personality: Optional[str]) -> str:
+    """구조화된 일정을 마크다운으로 변환 (테토는 한 줄 설명, 에겐은 여러 문장 설명)"""
+    one_line = personality in ["테토남", "테토녀"]
+    lines = []
+    for day_number, day in enumerate(itinerary.days, 1):
+        lines.append(f"{day_number}일차:")
+        for slot, label in TIME_SLOTS:
+            places = getattr(day, slot)
+            if not places:
+                continue
+            lines.append(f"**{label}**")
+            for place in places:
+                title = f"{place.name} ({place.time})" if place.time else place.name
+                description = (place.description or "").strip()
+                if one_line and description:
+                    description = description.splitlines()[0]
+                lines.append(f"- **{title}**: {description}" if description else f"- **{title}**")
+            lines.append("")
+    
+    closing = PERSONALITY_CLOSINGS.get(personality) or itinerary.closing
+    if closing:
+        lines.append(closing)
+    return "\n".join(lines).strip()
+
+def build_itinerary_system_prompt(personality: Optional[str]) -> str:
+    """일정 생성용 시스템 프롬프트 (성향별로 고정된 지시문, 사용자 데이터는 포함하지 않음)"""
+    personality_instruction = PERSONALITY_RESPONSE_BLOCKS.get(
+        personality, "- 마치 친구처럼 친근하고 자연스러운 말투로 사용자에게 말하세요."
+    )
+    if personality in ["에겐남", "에겐녀"]:
+        closing_instruction = """에겐: 
+- description: 각 장소마다 2-3문장으로 따뜻하고 자세한 설명 (분위기, 느낌, 추천 이유)
+- closing: 비워두세요 (성향별 마무리 인사가 따로 붙습니다)"""
+    elif personality in PERSONALITY_CLOSINGS:
+        closing_instruction = """테토:
+- description: 핵심 정보만 간단히 (1문장 이하)
+- closing: 비워두세요 (성향별 마무리 인사가 따로 붙습니다)"""
+    else:
+        closing_instruction = """- description: 핵심 정보만 간단히 (1문장 이하)
+- closing: 짧은 마무리 인사 또는 비워두기"""
     
-    return state
+    return f"""당신은 제주 여행 일정 추천 전문가입니다.
+
+{personality_instruction}
+- 제공된 데이터를 바탕으로, 대화 맥락과 사용자 정보를 종합해 정말 만족하고 편안할 수 있는 **현실적이고 실행 가능한** 여행 일정을 추천합니다.
+- 일정은 **오전 / 오후 / 저녁**으로 나누며, 각 시간대마다 **최소 1곳, 최대 2곳**의 장소를 제안하세요.
+- 장소 간 **지리적 효율성, 이동 동선, 소요 시간**을 고려해 계획하세요.
+- **식사 시간(아침, 점심, 저녁)**에는 반드시 **식사가 가능한 장소(식당 또는 식사 가능한 카페)**를 포함하세요.
+- **식사가 불가능한 카페**는 관광지로 간주하며, **관광 목적의 카페는 하루에 1곳까지만 포함**하세요.
+- **1일차 오후에는 반드시 숙소에 체크인**하며, 해당 숙소의 **정확한 이름**을 명시하세요.
+- **모든 날은 숙소에서 마무리**하며, **마지막 날은 반드시 공항에서 마무리**하세요.
+- 숙소는 정확한 이름으로 제시하세요.
+
+[출력 형식]
+- days: 일차별 일정, 각 일차는 morning(오전) / afternoon(오후) / evening(저녁) 장소 목록
+- 각 장소: name(정확한 장소명), time(방문 시각, 예: 11시), description(장소 설명)
+
+**작성 지침:**
+- 사용자 성향과 대화 맥락을 반영해 **개인화된 일정**을 작성하세요.
+- 시간대별로 **1~2개 장소**를 추천하며, **아침/점심/저녁 식사 장소는 반드시 포함**하세요.
+- **관광 목적의 카페는 하루 1개까지만** 포함하세요.
+- **1일차 오후에 숙소 체크인**, 모든 날은 **숙소에서 마무리**, 마지막 날은 **공항에서 마무리**되도록 하세요.
+
+**장소 설명 & 마무리:**
+{closing_instruction}
+"""
+
+# 여행 기간 문자열의 숫자 추출
+DAYS_RE = re.compile(r"\d+")
+
+# 일수별 응답 정보 활용량 (최대 일수, (호텔, 관광, 음식, 이벤트))
+RESPONSE_COUNT_TABLE = (
+    (2, (3, 6, 5, 2)),
+    (3, (3, 8, 6, 3)),
+    (4, (4, 10, 8, 4)),
+    (float("inf"), (5, 15, 10, 5))
+)
+
+# 성향별 일정 생성 시스템 프롬프트 (None: 성향 정보 없음)
+ITINERARY_SYSTEM_PROMPTS = {
+    personality: build_itinerary_system_prompt(personality)
+    for personality in [*PERSONALITY_STYLES, None]
+}
+
+# 응답 생성 후 체크포인트에서 비울 검색 결과 (매 턴 다시 검색하므로 보관 불필요)
+CLEARED_RESULTS = {
+    "hotel_results": (),
+    "travel_results": (),
+    "food_results": (),
+    "event_results": ()
+}
 
+# 개인화된 응답 생성 노드 (기존 로직 + 개인화 말투)
 async def personalized_response_node(state: PersonalizedGraphState) -> PersonalizedGraphState:
     """개인화된 최종 응답 생성 (기존 smart_chatbot.py 로직 + 개인화)"""
     user_message = state["user_message"]
@@ -728,243 +1058,110 @@ async def personalized_response_node(state: PersonalizedGraphState) -> Personali
     
     # 여행 기간별 결과 활용량 결정 (기존 로직)
     duration = user_profile.duration or ""
-    import re
-    numbers = re.findall(r'\d+', duration.lower())
-    days = max(int(num) for num in numbers) if numbers else 3
+    numbers = DAYS_RE.findall(duration)
+    days = max(map(int, numbers)) if numbers else 3
     
     # 일수에 따른 정보 활용량 조정
-    if days <= 2:
-        hotel_count, tour_count, food_count, event_count = 3, 6, 5, 2
-    elif days <= 3:
-        hotel_count, tour_count, food_count, event_count = 3, 8, 6, 3
-    elif days <= 4:
-        hotel_count, tour_count, food_count, event_count = 4, 10, 8, 4
-    else:
-        hotel_count, tour_count, food_count, event_count = 5, 15, 10, 5
+    hotel_count, tour_count, food_count, event_count = next(
+        counts for max_days, counts in RESPONSE_COUNT_TABLE if days <= max_days
+    )
     
     print(f"📊 개인화 응답 생성용 정보 활용: 호텔 {hotel_count}개, 관광 {tour_count}개, 음식 {food_count}개, 이벤트 {event_count}개")
     
-    # 개인화된 시스템 메시지 생성 (강력한 말투 반영)
-    personality_instruction = ""
-    if user_profile.personality and user_profile.travel_style:
-        style_info = PERSONALITY_STYLES.get(user_profile.personality, {})
-        example_phrases = style_info.get('example_phrases', [])
-        
-        personality_instruction = f"""
-🎭 **{user_profile.personality} 성향 필수 적용!**
-
-**말투**: {style_info.get('tone', '자연스러운 말투')}
-**핵심 표현**: {', '.join(example_phrases[:2])}
-
-{"**에겐**: 따뜻하고 자세한 설명, 감정 표현 풍부" if user_profile.personality in ["에겐남", "에겐녀"] else "**테토**: 간결하고 직설적, 핵심만 간단히"}
-"""
-    else:
-        personality_instruction = "- 마치 친구처럼 친근하고 자연스러운 말투로 사용자에게 말하세요."
+    # 성향별 고정 시스템 프롬프트 + 사용자별 입력 데이터 (접두부를 매 호출 동일하게 유지)
+    prompt_personality = user_profile.personality if user_profile.travel_style else None
+    system_prompt = ITINERARY_SYSTEM_PROMPTS.get(prompt_personality, ITINERARY_SYSTEM_PROMPTS[None])
     
-    prompt = f"""
-[시스템 메시지]
-당신은 제주 여행 일정 추천 전문가입니다.
-
-{personality_instruction}
-- 제공된 데이터를 바탕으로, 대화 맥락과 사용자 정보를 종합해 정말 만족하고 편안할 수 있는 **현실적이고 실행 가능한** 여행 일정을 추천합니다.
-- 일정은 **오전 / 오후 / 저녁**으로 나누며, 각 시간대마다 **최소 1곳, 최대 2곳**의 장소를 제안하세요.
-- 장소 간 **지리적 효율성, 이동 동선, 소요 시간**을 고려해 계획하세요.
-- **식사 시간(아침, 점심, 저녁)**에는 반드시 **식사가 가능한 장소(식당 또는 식사 가능한 카페)**를 포함하세요.
-- **식사가 불가능한 카페**는 관광지로 간주하며, **관광 목적의 카페는 하루에 1곳까지만 포함**하세요.
-- **1일차 오후에는 반드시 숙소에 체크인**하며, 해당 숙소의 **정확한 이름**을 명시하세요.
-- **모든 날은 숙소에서 마무리**하며, **마지막 날은 반드시 공항에서 마무리**하세요.
-- 숙소는 정확한 이름으로 제시하세요.
-
-[예시 형식]
-1일차:
-**오전**
-- 장소 A(11시): …
-
-**오후**
-- 장소 B(13시): …
-- 장소 C(16시): …
-
-**저녁**
-- 장소 D(19시): …
-- 장소 E(21시): …
-
-2일차:
-...
-
-[실제 태스크]
-아래 정보를 바탕으로, 위 형식대로 제주도 일정을 구성하세요.
+    user_prompt = f"""[실제 태스크]
+아래 정보를 바탕으로, 지시된 형식대로 제주도 일정을 구성하세요.
 
 **입력 정보:**
 - 사용자 프로필: {user_profile.get_summary()}
 - 최근 대화 내용: {history_summary or "첫 질문입니다"}
-- 숙박 정보: {json.dumps([{"name": h.get("name", ""), "description": str(h.get("content") or h.get("description") or "")} for h in hotel_results[:hotel_count]], ensure_ascii=False)}
-- 관광 정보: {json.dumps([{"name": t.get("name", ""), "description": str(t.get("content") or t.get("description") or "")} for t in travel_results[:tour_count]], ensure_ascii=False)}
-- 음식 정보: {json.dumps([{"name": f.get("name", ""), "description": str(f.get("content") or f.get("description") or "")} for f in food_results[:food_count]], ensure_ascii=False)}
-
-**작성 지침:**
-- 사용자 성향과 대화 맥락을 반영해 **개인화된 일정**을 작성하세요.
-- 시간대별로 **1~2개 장소**를 추천하며, **아침/점심/저녁 식사 장소는 반드시 포함**하세요.
-- **관광 목적의 카페는 하루 1개까지만** 포함하세요.
-- **1일차 오후에 숙소 체크인**, 모든 날은 **숙소에서 마무리**, 마지막 날은 **공항에서 마무리**되도록 하세요.
-
-**장소 설명 & 마무리:**
-{f'''에겐: 
-- 각 장소마다 2-3문장으로 따뜻하고 자세한 설명 (분위기, 느낌, 추천 이유)
-- 마무리: "즐거운 여행 되세요!", "편안한 여행 되시길 바라요!" 같은 따뜻한 인사''' if user_profile.personality in ["에겐남", "에겐녀"] else '''테토:
-- 장소명과 핵심 정보만 간단히 (1문장 이하)
-- 마무리: "끝", "이상" 또는 아예 마무리 인사 없이'''}
+- 숙박 정보: {orjson.dumps(hotel_results[:hotel_count]).decode()}
+- 관광 정보: {orjson.dumps(travel_results[:tour_count]).decode()}
+- 음식 정보: {orjson.dumps(food_results[:food_count]).decode()}
 """
+    messages = [SystemMessage(content=system_prompt), HumanMessage(content=user_prompt)]
     
     try:
         # 복잡한 일정 생성을 위한 넉넉한 타임아웃 (120초)
-        response = await asyncio.wait_for(
-            response_llm.ainvoke(prompt), 
+        itinerary = await asyncio.wait_for(
+            itinerary_generator.ainvoke(messages), 
             timeout=120.0
         )
-        final_response = response.content.strip()
-        
-        # 🎯 성향별 하드코딩 후처리 (LLM이 일관성 없게 나올 때 강제 보정)
-        if user_profile and user_profile.personality:
-            final_response = apply_personality_hardcoding(final_response, user_profile.personality)
+        final_response = render_itinerary(itinerary, user_profile.personality)
         
         # 대화 기록에 응답 추가
-        conversation_history.append({
-            "role": "assistant",
-            "message": final_response, 
-            "timestamp": datetime.now().isoformat()
-        })
+        append_history(conversation_history, "assistant", final_response)
         
         return {
-            **state,
             "final_response": final_response,
-            "conversation_history": conversation_history
+            "conversation_history": conversation_history,
+            **CLEARED_RESULTS
         }
         
     except Exception as e:
         print(f"❌ 개인화 응답 생성 오류: {e}")
         return {
-            **state,
             "final_response": "죄송합니다. 일정 생성 중 오류가 발생했습니다.",
-            "conversation_history": conversation_history
+            "conversation_history": conversation_history,
+            **CLEARED_RESULTS
         }
 
-def apply_personality_hardcoding(response: str, personality: str) -> str:
-    """성향별 하드코딩 후처리 - 장소 설명 & 마무리 문장 성향별 처리"""
-    
-    # 기존 따뜻한/차가운 마무리 문구들 제거 (일관성을 위해)
-    common_endings = [
-        "즐거운 여행 되세요!", "편안한 여행 되시길 바라요!", "좋은 여행 되세요!",
-        "마음에 드실 거예요!", "기분 좋아지실 거예요!", "힐링되실 거예요!",
-        "제주에서의 즐거운 시간 되세요!", "좋은 추억 만드세요!", "안전한 여행 되세요!",
-        "끝.", "이상.", "끝", "이상"
-    ]
-    
-    for ending in common_endings:
-        if response.endswith(ending):
-            response = response.rstrip(ending).rstrip()
-    
-    # 🎯 장소 설명 처리 (테토는 장소명만, 에겐은 설명 유지)
-    if personality in ["테토남", "테토녀"]:
-        print(f"🔥 테토 성향 하드코딩 적용: {personality}")  # 디버깅용
-        
-        # 테토 성향: 무조건 강력하게 설명 제거
-        lines = response.split('\n')
-        cleaned_lines = []
-        
-        for line in lines:
-            # 1. 일정 구조 라인들은 그대로 유지
-            if (line.startswith('###') or 
-                line.startswith('**오전') or line.startswith('**오후') or line.startswith('**저녁') or
-                line.strip() == '' or
-                '일차' in line):
-                cleaned_lines.append(line)
-                continue
-            
-            # 2. 장소 라인 처리: 콜론(:) 뒤 모든 설명 무조건 제거
-            if line.startswith('- **') or line.startswith('-**'):
-                # "- **장소명**: 설명" → "- **장소명**"
-                # "- **장소명 (시간)**: 설명" → "- **장소명 (시간)**"
-                if ':' in line:
-                    # 콜론 앞부분만 가져오기
-                    place_part = line.split(':')[0].strip()
-                    cleaned_lines.append(place_part)
-                else:
-                    cleaned_lines.append(line)
-                continue
-            
-            # 3. 기타 설명 문장들은 모두 제거 (숫자나 특수문자로 시작하지 않는 일반 문장들)
-            if (line.strip() and 
-                not line.startswith('#') and 
-                not line.startswith('**') and 
-                not line.startswith('-') and
-                not line.startswith('>')):
-                # 설명 문장이므로 제거
-                continue
-            else:
-                cleaned_lines.append(line)
-        
-        response = '\n'.join(cleaned_lines)
-        print(f"🔥 테토 처리 완료. 결과 길이: {len(response)}")  # 디버깅용
-    
-    # 각 성향별 특징적인 마무리 문장 추가
-    if personality == "에겐남":
-        response += "\n\n정말 좋은 여행이 될 것 같습니다. 혹시 더 궁금한 것이 있으시면 언제든 말씀해 주세요. 편안하고 즐거운 제주 여행 되시길 바랍니다! 😊"
-        
-    elif personality == "에겐녀":
-        response += "\n\n와~ 정말 설레는 여행 계획이네요! 혹시 걱정되는 부분이나 더 알고 싶은 게 있으시면 언제든 말씀해 주세요. 힐링 가득한 제주 여행 되시길 진심으로 바라요! 💕✨"
-        
-    elif personality == "테토남":
-        response += "\n\n이상. 더 필요한 정보 있으면 말해."
-        
-    elif personality == "테토녀":
-        response += "\n\n끝. 다른 거 필요하면 또 말해."
-    
-    return response
+# 카테고리별 검색 의도 키워드
+SEARCH_KEYWORDS = {
+    "hotel": ["숙박", "호텔", "펜션", "리조트", "게스트하우스", "잠", "머물", "체크인", "숙소"],
+    "travel": ["관광", "여행지", "명소", "가볼만한", "구경", "관광지", "장소", "코스", "여행", "일정"],
+    "food": ["맛집", "음식", "식당", "카페", "먹을", "요리", "특산품", "디저트", "점심", "저녁", "식사"],
+    "event": ["축제", "이벤트", "행사", "공연", "체험", "활동", "프로그램"]
+}
+KEYWORD_CATEGORIES = {
+    keyword: category for category, keywords in SEARCH_KEYWORDS.items() for keyword in keywords
+}
+
+# 모든 키워드를 한 번에 찾는 정규식 (전방탐색으로 겹치는 위치의 키워드도 모두 매칭)
+KEYWORD_RE = re.compile(
+    "(?=(" + "|".join(re.escape(k) for k in sorted(KEYWORD_CATEGORIES, key=len, reverse=True)) + "))"
+)
 
-# 라우팅 함수들 (여행 계획 시 모든 카테고리 검색)
+def classify_message(user_message: str) -> set:
+    """메시지를 한 번만 훑어 검색 의도가 있는 카테고리 집합 반환"""
+    return {KEYWORD_CATEGORIES[match.group(1)] for match in KEYWORD_RE.finditer(user_message.lower())}
+
+def get_search_flags(state: PersonalizedGraphState) -> set:
+    """수집 노드에서 계산해 둔 검색 의도 (상태에 없으면 메시지에서 계산)"""
+    search_flags = state.get("search_flags")
+    return classify_message(state["user_message"]) if search_flags is None else search_flags
+
+# 라우팅 함수들 (여행 계획 시 일정에 쓰이는 카테고리만 검색)
 def should_search_hotels(state: PersonalizedGraphState) -> bool:
-    """숙박 검색 필요 여부 판단 - 프로필이 있으면 무조건 검색"""
-    user_profile = state.get("user_profile")
-    if user_profile:
-        return True  # 프로필이 있으면 무조건 검색
+    """숙박 검색 필요 여부 판단 - 프로필이 준비되면 일정 생성에 쓰이므로 무조건 검색"""
+    if state.get("profile_ready"):
+        return True  # 일정 프롬프트에 들어가는 카테고리
     
-    # 프로필이 없을 때만 키워드 기반 판단
-    user_message = state["user_message"].lower()
-    hotel_keywords = ["숙박", "호텔", "펜션", "리조트", "게스트하우스", "잠", "머물", "체크인", "숙소"]
-    return any(keyword in user_message for keyword in hotel_keywords)
+    # 프로필이 준비되지 않았을 때만 키워드 기반 판단
+    return "hotel" in get_search_flags(state)
 
 def should_search_travel(state: PersonalizedGraphState) -> bool:
-    """관광지 검색 필요 여부 판단 - 프로필이 있으면 무조건 검색"""
-    user_profile = state.get("user_profile")
-    if user_profile:
-        return True  # 프로필이 있으면 무조건 검색
+    """관광지 검색 필요 여부 판단 - 프로필이 준비되면 일정 생성에 쓰이므로 무조건 검색"""
+    if state.get("profile_ready"):
+        return True  # 일정 프롬프트에 들어가는 카테고리
     
-    # 프로필이 없을 때만 키워드 기반 판단
-    user_message = state["user_message"].lower()
-    travel_keywords = ["관광", "여행지", "명소", "가볼만한", "구경", "관광지", "장소", "코스", "여행", "일정"]
-    return any(keyword in user_message for keyword in travel_keywords)
+    # 프로필이 준비되지 않았을 때만 키워드 기반 판단
+    return "travel" in get_search_flags(state)
 
 def should_search_food(state: PersonalizedGraphState) -> bool:
-    """음식 검색 필요 여부 판단 - 프로필이 있으면 무조건 검색"""
-    user_profile = state.get("user_profile")
-    if user_profile:
-        return True  # 프로필이 있으면 무조건 검색
+    """음식 검색 필요 여부 판단 - 프로필이 준비되면 일정 생성에 쓰이므로 무조건 검색"""
+    if state.get("profile_ready"):
+        return True  # 일정 프롬프트에 들어가는 카테고리
     
-    # 프로필이 없을 때만 키워드 기반 판단
-    user_message = state["user_message"].lower()
-    food_keywords = ["맛집", "음식", "식당", "카페", "먹을", "요리", "특산품", "디저트", "점심", "저녁", "식사"]
-    return any(keyword in user_message for keyword in food_keywords)
+    # 프로필이 준비되지 않았을 때만 키워드 기반 판단
+    return "food" in get_search_flags(state)
 
 def should_search_events(state: PersonalizedGraphState) -> bool:
-    """이벤트 검색 필요 여부 판단 - 프로필이 있으면 무조건 검색"""
-    user_profile = state.get("user_profile")
-    if user_profile:
-        return True  # 프로필이 있으면 무조건 검색
-    
-    # 프로필이 없을 때만 키워드 기반 판단
-    user_message = state["user_message"].lower()
-    event_keywords = ["축제", "이벤트", "행사", "공연", "체험", "활동", "프로그램"]
-    return any(keyword in user_message for keyword in event_keywords)
+    """이벤트 검색 필요 여부 판단 - 이벤트 결과는 일정 프롬프트에 쓰이지 않으므로 요청이 있을 때만 검색"""
+    return "event" in get_search_flags(state)
 
 # 라우팅 로직 (병렬 검색용으로 변경)
 def should_continue_to_search(state: PersonalizedGraphState) -> str:
@@ -977,278 +1174,176 @@ def should_continue_to_search(state: PersonalizedGraphState) -> str:
     else:
         return "response_generation"
 
+# 여행 스타일 분류 (앞에 있는 분류가 우선, "default": 어느 분류에도 속하지 않는 스타일)
+STYLE_BUCKETS = (
+    ("activity", ("액티비티", "활동", "모험")),
+    ("healing", ("힐링", "휴식", "여유")),
+    ("emotional", ("감성", "카페", "예쁜")),
+    ("food", ("음식", "맛집")),
+    ("nature", ("자연", "풍경"))
+)
+
+# 카테고리별 여행 스타일 수식어 (관광 "default"는 여행 스타일 문구를 그대로 사용)
+STYLE_TEMPLATES = {
+    ("hotel", "activity"): "액티비티 중심의 편리한 위치의",
+    ("hotel", "healing"): "힐링과 휴식을 위한 조용하고 평화로운",
+    ("hotel", "emotional"): "감성적이고 분위기 좋은",
+    ("hotel", "food"): "맛집 접근성이 좋은",
+    ("hotel", "nature"): "자연 풍경이 아름다운",
+    ("hotel", "default"): "편안한",
+    ("tour", "activity"): "액티비티와 모험을 즐길 수 있는 스릴넘치는",
+    ("tour", "healing"): "힐링과 휴식을 위한 평화로운",
+    ("tour", "emotional"): "감성적이고 예쁜 분위기의",
+    ("tour", "food"): "맛집과 연계된",
+    ("tour", "nature"): "아름다운 자연풍경의",
+    ("food", "activity"): "에너지 충전을 위한 든든한",
+    ("food", "healing"): "힐링되는 편안한 분위기의",
+    ("food", "emotional"): "감성적이고 분위기 좋은",
+    ("food", "food"): "현지인이 인정하는 진짜",
+    ("food", "nature"): "자연과 함께하는 뷰 맛집",
+    ("food", "default"): "맛있는",
+    ("event", "activity"): "액티비티와 체험 활동 중심의 역동적인",
+    ("event", "healing"): "힐링과 여유를 느낄 수 있는 평화로운",
+    ("event", "emotional"): "감성적이고 포토제닉한",
+    ("event", "food"): "음식과 관련된",
+    ("event", "nature"): "자연과 함께하는",
+    ("event", "default"): "재미있는"
+}
+
+# 카테고리별 성향 수식어 (테토/에겐)
+PERSONALITY_FEATURES = {
+    "hotel": {"테토": "효율적이고 모던한", "에겐": "따뜻하고 아늑한"},
+    "tour": {"테토": "도전적이고 특별한", "에겐": "편안하고 따뜻한"},
+    "food": {"테토": "유명한 핫플레이스", "에겐": "따뜻하고 정겨운"},
+    "event": {"테토": "인기 있고 트렌디한", "에겐": "따뜻한 분위기의"}
+}
+
+# 카테고리별 동행자 수식어 (관광 쿼리는 동행자를 직접 사용)
+GROUP_FEATURES = {
+    "hotel": {"커플": "로맨틱한 오션뷰", "가족": "가족 친화적인", "친구": "넓고 편리한", "혼자": "1인 여행객에게 최적인"},
+    "food": {"커플": "로맨틱한 데이트", "가족": "가족 단위로 즐기기 좋은", "친구": "친구들과 함께 가기 좋은", "혼자": "혼밥하기 좋은"},
+    "event": {"커플": "커플이 함께 즐기기 좋은", "가족": "가족 단위로 참여하기 좋은", "친구": "친구들과 함께 즐기기 좋은", "혼자": "혼자서도 즐길 수 있는"}
+}
+
+# 여행 스타일 키워드 → 분류 (부분 문자열 매칭 유지: "활동적인"도 "활동"으로 분류)
+STYLE_KEYWORD_BUCKETS = {keyword: bucket for bucket, keywords in STYLE_BUCKETS for keyword in keywords}
+STYLE_KEYWORD_RE = re.compile("|".join(map(re.escape, STYLE_KEYWORD_BUCKETS)))
+STYLE_BUCKET_PRIORITY = [bucket for bucket, _ in STYLE_BUCKETS]
+
+def classify_style(travel_style: Optional[str]) -> Optional[str]:
+    """여행 스타일 문구를 한 번 훑어 분류 (스타일이 없으면 None, 여러 개면 STYLE_BUCKETS 순서 우선)"""
+    if not travel_style:
+        return None
+    buckets = {STYLE_KEYWORD_BUCKETS[keyword] for keyword in STYLE_KEYWORD_RE.findall(travel_style.lower())}
+    return next((bucket for bucket in STYLE_BUCKET_PRIORITY if bucket in buckets), "default")
+
+def get_style_feature(category: str, bucket: Optional[str], travel_style: Optional[str]) -> str:
+    """카테고리별 여행 스타일 수식어 (bucket은 classify_style 결과)"""
+    if bucket is None:
+        return ""
+    if (category, bucket) not in STYLE_TEMPLATES:
+        return travel_style.replace("여행", "").strip()
+    return STYLE_TEMPLATES[(category, bucket)]
+
+def get_personality_feature(category: str, personality: Optional[str]) -> str:
+    """카테고리별 성향 수식어 (테토남/테토녀 → 테토, 에겐남/에겐녀 → 에겐)"""
+    if personality not in PERSONALITY_STYLES:
+        return ""
+    return PERSONALITY_FEATURES[category][personality[:2]]
+
+# 여행 기간 문자열에서 "N박"/"N일"의 N 추출
+DURATION_RE = re.compile(r"(\d+)\s*[박일]")
+
+# 여행 기간별 검색 개수 (smart_chatbot.py와 완전 동일)
+SEARCH_COUNTS = {
+    1: {"hotel": 3, "tour": 4, "food": 3, "event": 2},
+    2: {"hotel": 3, "tour": 6, "food": 5, "event": 3}, 
+    3: {"hotel": 4, "tour": 8, "food": 6, "event": 3},
+    4: {"hotel": 4, "tour": 12, "food": 8, "event": 4},
+    5: {"hotel": 5, "tour": 15, "food": 10, "event": 5}
+}
+DEFAULT_SEARCH_COUNTS = {"hotel": 5, "tour": 18, "food": 12, "event": 6}
+
+# 카테고리별 검색 쿼리 템플릿 ({modifiers}는 비어 있지 않은 수식어마다 뒤에 공백을 붙여 채움)
+QUERY_TEMPLATES = {
+    "hotel": "{region} 지역의 {modifiers}호텔과 숙박시설을 추천해주세요".format_map,
+    "tour": "{region} 지역에서 {group}이 {interests}을 즐길 수 있는 {modifiers}관광지와 명소를 찾아주세요".format_map,
+    "food": "{region} 지역의 {modifiers}맛집과 식당을 추천해주세요".format_map,
+    "event": "{region} 지역의 {modifiers}이벤트와 축제, 체험 활동을 추천해주세요".format_map
+}
+
+# 쿼리 로그 라벨
+QUERY_LABELS = {"hotel": "🏨 호텔", "tour": "🗺️ 관광지", "food": "🍽️ 음식", "event": "🎉 이벤트"}
+
+def build_search_query(kind: str, region: str, style_bucket: Optional[str], travel_style: Optional[str], personality: Optional[str], group_type: Optional[str], interests: Tuple[str, ...]) -> str:
+    """카테고리별 검색 쿼리 생성 (여행 스타일/성향/동행자 수식어는 모듈 테이블 조회)"""
+    modifiers = (
+        get_style_feature(kind, style_bucket, travel_style),
+        get_personality_feature(kind, personality),
+        GROUP_FEATURES[kind].get(group_type, "") if kind in GROUP_FEATURES else ""
+    )
+    query = QUERY_TEMPLATES[kind]({
+        "region": region,
+        "group": group_type or "여행객",
+        "interests": " ".join(interests) if interests else "관광",
+        "modifiers": "".join(f"{modifier} " for modifier in modifiers if modifier)
+    })
+    print(f"{QUERY_LABELS[kind]} 검색 쿼리: '{query}'")
+    return query
+
+# 검색 계획: (상태 키, 검색 여부 판단, 벡터 DB 카테고리, 쿼리/검색 개수 종류)
+SEARCH_PLAN = [
+    ("hotel_results", should_search_hotels, "hotel", "hotel"),
+    ("travel_results", should_search_travel, "travel", "tour"),
+    ("food_results", should_search_food, "food", "food"),
+    ("event_results", should_search_events, "event", "event")
+]
+
 # 개인화된 병렬 검색 함수
 async def personalized_parallel_search_all(state: PersonalizedGraphState) -> PersonalizedGraphState:
     """모든 카테고리를 병렬로 검색 (개인화된 버전)"""
     user_profile = state["user_profile"]
     
-    # 여행 기간에 따른 검색 개수 결정 (smart_chatbot과 동일)
-    duration_days = 3  # 기본값
-    if user_profile.duration:
-        if "1박" in user_profile.duration or "1일" in user_profile.duration:
-            duration_days = 1
-        elif "2박" in user_profile.duration or "2일" in user_profile.duration:
-            duration_days = 2
-        elif "3박" in user_profile.duration or "3일" in user_profile.duration:
-            duration_days = 3
-        elif "4박" in user_profile.duration or "4일" in user_profile.duration:
-            duration_days = 4
-        elif "5박" in user_profile.duration or "5일" in user_profile.duration:
-            duration_days = 5
-    
-    # 여행 기간별 검색 개수 (smart_chatbot.py와 완전 동일)
-    search_counts = {
-        1: {"hotel": 3, "tour": 4, "food": 3, "event": 2},
-        2: {"hotel": 3, "tour": 6, "food": 5, "event": 3}, 
-        3: {"hotel": 4, "tour": 8, "food": 6, "event": 3},
-        4: {"hotel": 4, "tour": 12, "food": 8, "event": 4},
-        5: {"hotel": 5, "tour": 15, "food": 10, "event": 5}
-    }.get(duration_days, {"hotel": 5, "tour": 18, "food": 12, "event": 6})
+    # 여행 기간에 따른 검색 개수 결정 (첫 "N박"/"N일"의 N, 1~5일 외에는 기본 3일)
+    match = DURATION_RE.search(user_profile.duration or "")
+    duration_days = int(match.group(1)) if match and 1 <= int(match.group(1)) <= 5 else 3
+    search_counts = SEARCH_COUNTS.get(duration_days, DEFAULT_SEARCH_COUNTS)
     
     print(f"📊 여행 기간 {duration_days}일 기준 검색 개수: {search_counts}")
     
     print(f"🔍 개인화된 병렬 검색 시작 - 검색 개수: {search_counts}")
     
-    # 각 카테고리별 개인화된 쿼리 생성 및 병렬 검색
-    async def search_hotels():
-        should_search = should_search_hotels(state)
-        print(f"🏨 호텔 검색 조건: {should_search}")
-        
-        if should_search:
-            # 여행 스타일 기반 강화된 숙박 쿼리 생성
-            accommodation_style = ""
-            if user_profile.travel_style:
-                style = user_profile.travel_style.lower()
-                if "액티비티" in style or "활동" in style or "모험" in style:
-                    accommodation_style = "액티비티 중심의 편리한 위치의"
-                elif "힐링" in style or "휴식" in style or "여유" in style:
-                    accommodation_style = "힐링과 휴식을 위한 조용하고 평화로운"
-                elif "감성" in style or "카페" in style or "예쁜" in style:
-                    accommodation_style = "감성적이고 분위기 좋은"
-                elif "음식" in style or "맛집" in style:
-                    accommodation_style = "맛집 접근성이 좋은"
-                elif "자연" in style or "풍경" in style:
-                    accommodation_style = "자연 풍경이 아름다운"
-                else:
-                    accommodation_style = "편안한"
-            
-            # 성향별 숙박 특성
-            personality_feature = ""
-            if user_profile.personality in ["테토남", "테토녀"]:
-                personality_feature = "효율적이고 모던한"
-            elif user_profile.personality in ["에겐남", "에겐녀"]:
-                personality_feature = "따뜻하고 아늑한"
-            
-            # 동행자별 숙박 특성
-            group_feature = ""
-            if user_profile.group_type == "커플":
-                group_feature = "로맨틱한 오션뷰"
-            elif user_profile.group_type == "가족":
-                group_feature = "가족 친화적인"
-            elif user_profile.group_type == "친구":
-                group_feature = "넓고 편리한"
-            elif user_profile.group_type == "혼자":
-                group_feature = "1인 여행객에게 최적인"
-            
-            region_part = f"{user_profile.travel_region or '제주도'} 지역"
-            style_part = f"{accommodation_style} {personality_feature} {group_feature}".strip()
-            
-            query = f"{region_part}의 {style_part} 호텔과 숙박시설을 추천해주세요"
-            print(f"🏨 호텔 검색 쿼리: '{query}' (개수: {search_counts['hotel']})")
-            
-            results = await search_vector_db(query, "hotel", top_k=search_counts["hotel"])
-            print(f"🏨 호텔 검색 결과: {len(results)}개")
-            return results
-        return []
-    
-    async def search_tours():
-        should_search = should_search_travel(state)
-        print(f"🗺️ 관광지 검색 조건: {should_search}")
-        
-        if should_search:
-            # 여행 스타일 기반 강화된 쿼리 생성
-            interests = " ".join(user_profile.interests) if user_profile.interests else "관광"
-            
-            # 여행 스타일에서 핵심 키워드 추출
-            travel_style_keywords = ""
-            if user_profile.travel_style:
-                style = user_profile.travel_style.lower()
-                if "액티비티" in style or "활동" in style or "모험" in style:
-                    travel_style_keywords = "액티비티와 모험을 즐길 수 있는 스릴넘치는"
-                elif "힐링" in style or "휴식" in style or "여유" in style:
-                    travel_style_keywords = "힐링과 휴식을 위한 평화로운"  
-                elif "감성" in style or "카페" in style or "예쁜" in style:
-                    travel_style_keywords = "감성적이고 예쁜 분위기의"
-                elif "음식" in style or "맛집" in style:
-                    travel_style_keywords = "맛집과 연계된"
-                elif "자연" in style or "풍경" in style:
-                    travel_style_keywords = "아름다운 자연풍경의"
-                else:
-                    travel_style_keywords = user_profile.travel_style.replace("여행", "").strip()
-            
-            # 성향별 형용사 추가
-            personality_adj = ""
-            if user_profile.personality in ["테토남", "테토녀"]:
-                personality_adj = "도전적이고 특별한"
-            elif user_profile.personality in ["에겐남", "에겐녀"]:
-                personality_adj = "편안하고 따뜻한"
-            
-            # 통합 쿼리 생성
-            region_part = f"{user_profile.travel_region or '제주도'} 지역"
-            group_part = f"{user_profile.group_type or '여행객'}"
-            style_part = f"{travel_style_keywords} {personality_adj}".strip()
-            
-            query = f"{region_part}에서 {group_part}이 {interests}을 즐길 수 있는 {style_part} 관광지와 명소를 찾아주세요"
-            print(f"🗺️ 관광지 검색 쿼리: '{query}' (개수: {search_counts['tour']})")
-            
-            results = await search_vector_db(query, "travel", top_k=search_counts["tour"])
-            print(f"🗺️ 관광지 검색 결과: {len(results)}개")
-            return results
-        return []
-    
-    async def search_foods():
-        should_search = should_search_food(state)
-        print(f"🍽️ 음식 검색 조건: {should_search}")
-        
-        if should_search:
-            # 여행 스타일 기반 강화된 음식 쿼리 생성
-            food_style = ""
-            if user_profile.travel_style:
-                style = user_profile.travel_style.lower()
-                if "액티비티" in style or "활동" in style or "모험" in style:
-                    food_style = "에너지 충전을 위한 든든한"
-                elif "힐링" in style or "휴식" in style or "여유" in style:
-                    food_style = "힐링되는 편안한 분위기의"
-                elif "감성" in style or "카페" in style or "예쁜" in style:
-                    food_style = "감성적이고 분위기 좋은"
-                elif "음식" in style or "맛집" in style:
-                    food_style = "현지인이 인정하는 진짜"
-                elif "자연" in style or "풍경" in style:
-                    food_style = "자연과 함께하는 뷰 맛집"
-                else:
-                    food_style = "맛있는"
-            
-            # 성향별 음식 특성
-            personality_food = ""
-            if user_profile.personality in ["테토남", "테토녀"]:
-                personality_food = "유명한 핫플레이스"
-            elif user_profile.personality in ["에겐남", "에겐녀"]:
-                personality_food = "따뜻하고 정겨운"
-            
-            # 동행자별 음식점 특성
-            group_food = ""
-            if user_profile.group_type == "커플":
-                group_food = "로맨틱한 데이트"
-            elif user_profile.group_type == "가족":
-                group_food = "가족 단위로 즐기기 좋은"
-            elif user_profile.group_type == "친구":
-                group_food = "친구들과 함께 가기 좋은"
-            elif user_profile.group_type == "혼자":
-                group_food = "혼밥하기 좋은"
-            
-            region_part = f"{user_profile.travel_region or '제주도'} 지역"
-            style_part = f"{food_style} {personality_food} {group_food}".strip()
-            
-            query = f"{region_part}의 {style_part} 맛집과 식당을 추천해주세요"
-            print(f"🍽️ 음식 검색 쿼리: '{query}' (개수: {search_counts['food']})")
-            
-            results = await search_vector_db(query, "food", top_k=search_counts["food"])
-            print(f"🍽️ 음식 검색 결과: {len(results)}개")
-            return results
-        return []
-    
-    async def search_events():
-        should_search = should_search_events(state)
-        print(f"🎉 이벤트 검색 조건: {should_search}")
-        
-        if should_search:
-            # 여행 스타일 기반 강화된 이벤트 쿼리 생성
-            event_style = ""
-            if user_profile.travel_style:
-                style = user_profile.travel_style.lower()
-                if "액티비티" in style or "활동" in style or "모험" in style:
-                    event_style = "액티비티와 체험 활동 중심의 역동적인"
-                elif "힐링" in style or "휴식" in style or "여유" in style:
-                    event_style = "힐링과 여유를 느낄 수 있는 평화로운"
-                elif "감성" in style or "카페" in style or "예쁜" in style:
-                    event_style = "감성적이고 포토제닉한"
-                elif "음식" in style or "맛집" in style:
-                    event_style = "음식과 관련된"
-                elif "자연" in style or "풍경" in style:
-                    event_style = "자연과 함께하는"
-                else:
-                    event_style = "재미있는"
-            
-            # 성향별 이벤트 특성
-            personality_event = ""
-            if user_profile.personality in ["테토남", "테토녀"]:
-                personality_event = "인기 있고 트렌디한"
-            elif user_profile.personality in ["에겐남", "에겐녀"]:
-                personality_event = "따뜻한 분위기의"
-            
-            # 동행자별 이벤트 특성
-            group_event = ""
-            if user_profile.group_type == "커플":
-                group_event = "커플이 함께 즐기기 좋은"
-            elif user_profile.group_type == "가족":
-                group_event = "가족 단위로 참여하기 좋은"
-            elif user_profile.group_type == "친구":
-                group_event = "친구들과 함께 즐기기 좋은"
-            elif user_profile.group_type == "혼자":
-                group_event = "혼자서도 즐길 수 있는"
-            
-            region_part = f"{user_profile.travel_region or '제주도'} 지역"
-            style_part = f"{event_style} {personality_event} {group_event}".strip()
-            
-            query = f"{region_part}의 {style_part} 이벤트와 축제, 체험 활동을 추천해주세요"
-            print(f"🎉 이벤트 검색 쿼리: '{query}' (개수: {search_counts['event']})")
-            
-            results = await search_vector_db(query, "event", top_k=search_counts["event"])
-            print(f"🎉 이벤트 검색 결과: {len(results)}개")
-            return results
-        return []
+    # 프로필 필드는 한 번만 읽어 모든 쿼리 생성에 공유 (build_search_query 인자 순서)
+    profile_fields = (
+        user_profile.travel_region or "제주도",
+        classify_style(user_profile.travel_style),  # 스타일 분류도 네 쿼리가 공유
+        user_profile.travel_style,
+        user_profile.personality,
+        user_profile.group_type,
+        user_profile.interests
+    )
+    
+    # 검색할 카테고리의 쿼리만 만들어 한 번의 배치 검색으로 처리
+    planned = [
+        (state_key, (build_search_query(kind, *profile_fields), category, search_counts[kind]))
+        for state_key, should_search, category, kind in SEARCH_PLAN
+        if should_search(state)
+    ]
+    print(f"🔎 검색 대상: {[state_key for state_key, _ in planned]}")
     
-    # 병렬 실행
     try:
-        hotel_results, tour_results, food_results, event_results = await asyncio.gather(
-            search_hotels(),
-            search_tours(), 
-            search_foods(),
-            search_events(),
-            return_exceptions=True
-        )
-        
-        # 예외 처리 및 디버깅
-        if isinstance(hotel_results, Exception):
-            print(f"❌ 호텔 검색 오류: {hotel_results}")
-            hotel_results = []
-        if isinstance(tour_results, Exception):
-            print(f"❌ 관광지 검색 오류: {tour_results}")
-            tour_results = []
-        if isinstance(food_results, Exception):
-            print(f"❌ 음식 검색 오류: {food_results}")
-            food_results = []
-        if isinstance(event_results, Exception):
-            print(f"❌ 이벤트 검색 오류: {event_results}")
-            event_results = []
-        
-        print(f"✅ 개인화된 병렬 검색 완료 - 호텔: {len(hotel_results)}, 관광: {len(tour_results)}, 음식: {len(food_results)}, 이벤트: {len(event_results)}")
-        
-        return {
-            "hotel_results": hotel_results,
-            "travel_results": tour_results,
-            "food_results": food_results,
-            "event_results": event_results
-        }
-        
+        results = await search_vector_db_batch([request for _, request in planned])
     except Exception as e:
         print(f"❌ 개인화된 병렬 검색 오류: {e}")
-        return {
-            "hotel_results": [],
-            "travel_results": [],
-            "food_results": [],
-            "event_results": []
-        }
+        return dict(CLEARED_RESULTS)
+    
+    # 검색하지 않은 카테고리는 빈 결과
+    update = dict(CLEARED_RESULTS)
+    update.update((state_key, sources) for (state_key, _), sources in zip(planned, results))
+    
+    print(f"✅ 개인화된 병렬 검색 완료 - 호텔: {len(update['hotel_results'])}, 관광: {len(update['travel_results'])}, 음식: {len(update['food_results'])}, 이벤트: {len(update['event_results'])}")
+    
+    return update
 
 # 라우팅 함수들 (smart_chatbot.py와 동일)
 def should_continue_to_agents(state: PersonalizedGraphState) -> str:
@@ -1263,6 +1358,30 @@ def should_continue_to_response(state: PersonalizedGraphState) -> str:
     return "response_generation"
 
 # 그래프 구성 (smart_chatbot.py와 동일한 구조)
+# 세션 상태 저장소 (REDIS_URL이 있으면 여러 워커가 Redis로 대화 상태 공유)
+REDIS_URL = os.getenv("REDIS_URL")
+
+def create_checkpointer():
+    """LangGraph 체크포인터 생성 (Redis 사용 불가 시 프로세스 메모리)"""
+    if REDIS_URL:
+        try:
+            from langgraph.checkpoint.redis.aio import AsyncRedisSaver
+            print("💾 Redis 체크포인터 사용")
+            return AsyncRedisSaver(redis_url=REDIS_URL)
+        except ImportError:
+            print("⚠️ langgraph-checkpoint-redis가 설치되지 않아 메모리 체크포인터를 사용합니다.")
+    return MemorySaver()
+
+checkpointer = create_checkpointer()
+checkpointer_ready = not REDIS_URL or isinstance(checkpointer, MemorySaver)
+
+async def setup_checkpointer():
+    """Redis 체크포인터는 첫 사용 전에 인덱스 생성이 필요 (한 번만 실행)"""
+    global checkpointer_ready
+    if not checkpointer_ready:
+        await checkpointer.asetup()
+        checkpointer_ready = True
+
 def create_personalized_graph():
     """개인화된 그래프 생성"""
     workflow = StateGraph(PersonalizedGraphState)
@@ -1303,10 +1422,7 @@ def create_personalized_graph():
     # 종료점 설정
     workflow.add_edge("response_generation", END)
     
-    # 메모리 설정
-    memory = MemorySaver()
-    
-    return workflow.compile(checkpointer=memory)
+    return workflow.compile(checkpointer=checkpointer)
 
 # 그래프 생성
 graph = create_personalized_graph()
@@ -1324,7 +1440,9 @@ class PersonalizedJejuChatbot:
         config = {"configurable": {"thread_id": self.session_id}}
         
         try:
-            # 기존 상태 불러오기 (메모리에서)
+            await setup_checkpointer()
+            
+            # 기존 상태 불러오기 (체크포인터에서)
             try:
                 current_state = await self.graph.aget_state(config)
                 if current_state and current_state.values:
@@ -1337,11 +1455,11 @@ class PersonalizedJejuChatbot:
                     state = {
                         "user_message": user_message,
                         "conversation_history": [],
-                        "user_profile": PersonalizedUserProfile(),
-                        "hotel_results": [],
-                        "travel_results": [],
-                        "food_results": [],
-                        "event_results": [],
+                        "user_profile": EMPTY_PROFILE,
+                        "hotel_results": (),
+                        "travel_results": (),
+                        "food_results": (),
+                        "event_results": (),
                         "final_response": "",
                         "profile_ready": False
                     }
@@ -1351,21 +1469,34 @@ class PersonalizedJejuChatbot:
                 state = {
                     "user_message": user_message,
                     "conversation_history": [],
-                    "user_profile": PersonalizedUserProfile(),
-                    "hotel_results": [],
-                    "travel_results": [],
-                    "food_results": [],
-                    "event_results": [],
+                    "user_profile": EMPTY_PROFILE,
+                    "hotel_results": (),
+                    "travel_results": (),
+                    "food_results": (),
+                    "event_results": (),
                     "final_response": "",
                     "profile_ready": False
                 }
             
-            # 그래프 실행
-            result = await self.graph.ainvoke(state, config)
+            # 고정된 단계(프로필 수집 → 병렬 검색 → 응답 생성)를 그래프 스케줄러 없이 직접 실행
+            update = {"user_message": user_message}
+            update.update(await personalized_profile_collector_node(state))
+            last_node = "profile_collection"
+            
+            if update["profile_ready"]:
+                state.update(update)
+                update.update(await personalized_parallel_search_all(state))
+                state.update(update)
+                update.update(await personalized_response_node(state))
+                last_node = "response_generation"
+            
+            # 실행 결과는 그래프 체크포인터에 한 번만 기록 (다음 턴에 aget_state로 불러옴)
+            await self.graph.aupdate_state(config, update, as_node=last_node)
+            result = update
             
             # 응답과 프로필 정보 반환
             response_text = result.get("final_response", "죄송합니다. 응답을 생성할 수 없습니다.")
-            user_profile = result.get("user_profile", PersonalizedUserProfile())
+            user_profile = result.get("user_profile", EMPTY_PROFILE)
             
             return {
                 "response": response_text,
@@ -1376,7 +1507,7 @@ class PersonalizedJejuChatbot:
             print(f"❌ 개인화 챗봇 실행 오류: {e}")
             return {
                 "response": "죄송합니다. 일시적인 오류가 발생했습니다. 다시 시도해주세요.",
-                "user_profile": PersonalizedUserProfile()
+                "user_profile": EMPTY_PROFILE
             }
 
 # FastAPI 서버 코드는 별도 파일로 분리 예정
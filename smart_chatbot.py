@@ -9,14 +9,35 @@
 """
 
 import asyncio
+import atexit
 import httpx
-import json
-from typing import Dict, List, Optional, TypedDict
-from dataclasses import dataclass, asdict
+import logging
+import logging.handlers
+import orjson
+import queue
+import random
+import re
+import textwrap
+import time
+from collections import OrderedDict
+from contextlib import AsyncExitStack
+from typing import Dict, List, Optional, Tuple, TypedDict
+from dataclasses import dataclass, asdict, field
+from functools import lru_cache
 from datetime import datetime
+from langchain_core.messages import HumanMessage, SystemMessage
 from langchain_upstage import ChatUpstage
 from langgraph.graph import StateGraph, END
 from langgraph.checkpoint.memory import MemorySaver
+from pydantic import BaseModel
+
+# 의미 기반 검색 캐시용 (설치되지 않았으면 캐시 비활성화)
+try:
+    import numpy as np
+    import torch
+    from sentence_transformers import SentenceTransformer
+except ImportError:
+    SentenceTransformer = None
 
 import os
 from dotenv import load_dotenv
@@ -27,6 +48,21 @@ load_dotenv()
 # 환경변수에서 API 키 가져오기
 UPSTAGE_API_KEY = os.getenv("UPSTAGE_API_KEY")
 
+# 로그 레벨 (환경변수 LOG_LEVEL, 기본 INFO - DEBUG가 아니면 노드별 디버그 로그 문자열을 만들지 않음)
+# 이벤트 루프에서는 큐에 넣기만 하고 실제 출력은 별도 스레드의 리스너가 담당
+# 루트 로거는 건드리지 않고 smart_chatbot 로거에만 큐 핸들러를 붙임 (import한 쪽의 로깅 설정 유지)
+LOG_QUEUE = queue.SimpleQueue()
+logger = logging.getLogger("smart_chatbot")
+logger.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+logger.addHandler(logging.handlers.QueueHandler(LOG_QUEUE))
+logger.propagate = False
+LOG_STREAM_HANDLER = logging.StreamHandler()
+LOG_STREAM_HANDLER.setFormatter(logging.Formatter("%(message)s"))
+LOG_LISTENER = logging.handlers.QueueListener(LOG_QUEUE, LOG_STREAM_HANDLER)
+LOG_LISTENER.start()
+# 서버 없이 import만 한 경우에도 프로세스 종료 시 남은 로그를 비우고 리스너 스레드 정리
+atexit.register(LOG_LISTENER.stop)
+
 @dataclass
 class UserProfile:
     """사용자 프로필 정보"""
@@ -36,16 +72,48 @@ class UserProfile:
     interests: List[str] = None
     budget: Optional[str] = None
     travel_region: Optional[str] = None
+    # 요약 텍스트 / 완성도 캐시 (필드가 바뀌면 무효화)
+    _summary_cache: Optional[str] = field(default=None, repr=False, compare=False)
+    _completion_cache: Optional[float] = field(default=None, repr=False, compare=False)
     
     def __post_init__(self):
         if self.interests is None:
             self.interests = []
     
+    def __setattr__(self, name, value):
+        # 프로필 필드가 바뀌면 캐시 무효화
+        if not name.startswith("_"):
+            object.__setattr__(self, "_summary_cache", None)
+            object.__setattr__(self, "_completion_cache", None)
+        object.__setattr__(self, name, value)
+    
+    def invalidate_cache(self):
+        """interests 리스트처럼 제자리에서 바뀌는 필드를 수정한 뒤 호출"""
+        self._summary_cache = None
+        self._completion_cache = None
+    
     def to_dict(self):
-        return asdict(self)
+        data = asdict(self)
+        del data["_summary_cache"]
+        del data["_completion_cache"]
+        return data
+    
+    def completion(self) -> float:
+        """채워진 프로필 필드 비율 (바뀌지 않았으면 이전 결과 재사용)"""
+        if self._completion_cache is None:
+            data = self.to_dict()
+            self._completion_cache = sum(1 for value in data.values() if value) / len(data)
+        return self._completion_cache
+    
+    def fingerprint(self) -> tuple:
+        """검색 쿼리에 영향을 주는 필드만 모은 키 (관심사 순서와 무관)"""
+        return (self.duration, self.group_type, self.travel_region, tuple(sorted(self.interests)), self.budget)
     
     def get_summary(self) -> str:
-        """프로필 요약 텍스트 생성"""
+        """프로필 요약 텍스트 생성 (바뀌지 않았으면 이전 결과 재사용)"""
+        if self._summary_cache is not None:
+            return self._summary_cache
+        
         summary_parts = []
         if self.travel_dates:
             summary_parts.append(f"날짜: {self.travel_dates}")
@@ -60,7 +128,17 @@ class UserProfile:
         if self.travel_region:
             summary_parts.append(f"여행지역: {self.travel_region}")
         
-        return " | ".join(summary_parts) if summary_parts else "정보 없음"
+        self._summary_cache = " | ".join(summary_parts) if summary_parts else "정보 없음"
+        return self._summary_cache
+
+class ProfileDelta(BaseModel):
+    """메시지에서 추출한 프로필 정보 (명시적으로 언급된 필드만 채워짐)"""
+    travel_dates: Optional[str] = None
+    duration: Optional[str] = None
+    group_type: Optional[str] = None
+    interests: Optional[List[str]] = None
+    budget: Optional[str] = None
+    travel_region: Optional[str] = None
 
 # LangGraph State 정의
 class GraphState(TypedDict):
@@ -74,43 +152,239 @@ class GraphState(TypedDict):
     event_results: List[Dict]
     final_response: str
     profile_ready: bool
-
-# 공용 LLM 인스턴스들 (각 에이전트별 독립 LLM)
-profile_llm = ChatUpstage(api_key=UPSTAGE_API_KEY, model="solar-pro")
-hotel_llm = ChatUpstage(api_key=UPSTAGE_API_KEY, model="solar-pro")
-travel_llm = ChatUpstage(api_key=UPSTAGE_API_KEY, model="solar-pro")
-food_llm = ChatUpstage(api_key=UPSTAGE_API_KEY, model="solar-pro")
-event_llm = ChatUpstage(api_key=UPSTAGE_API_KEY, model="solar-pro")
-response_llm = ChatUpstage(api_key=UPSTAGE_API_KEY, model="solar-pro")
+    search_prefetched: bool
+    search_degraded: bool
+
+# 공용 LLM 인스턴스 (모든 에이전트가 같은 모델이므로 하나의 클라이언트를 공유)
+shared_llm = ChatUpstage(api_key=UPSTAGE_API_KEY, model="solar-pro")
+# 프로필 추출 전용 구조화 출력 (스키마로 검증된 ProfileDelta를 바로 반환)
+profile_extractor = shared_llm.with_structured_output(ProfileDelta)
+
+# 여행 기간 문자열의 숫자 추출
+DIGITS_RE = re.compile(r"\d+")
+
+# 일수별 검색 개수 (calculate_search_counts, 6일 이상은 6일 기준)
+# 일정 프롬프트가 실제로 사용하는 개수만큼만 검색해 불필요한 결과 전송을 줄임
+SEARCH_COUNTS_BY_DAYS = {
+    1: {"hotel": 3, "tour": 4, "food": 3, "event": 2},
+    2: {"hotel": 3, "tour": 6, "food": 5, "event": 2},
+    3: {"hotel": 3, "tour": 8, "food": 6, "event": 3},
+    4: {"hotel": 4, "tour": 10, "food": 8, "event": 3},
+    5: {"hotel": 5, "tour": 15, "food": 10, "event": 3},
+    6: {"hotel": 5, "tour": 15, "food": 10, "event": 3}
+}
+DEFAULT_SEARCH_COUNTS = {"hotel": 3, "tour": 8, "food": 6, "event": 3}
 
 # 벡터 DB 접근 URL (advanced_jeju_chatbot RAG 서비스)
 RAG_URL = "http://localhost:8002/chat"
 
+# orjson으로 직렬화한 요청 본문에 붙이는 헤더
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+# 벡터 검색 시도당 읽기 타임아웃 상한 (초)
+SEARCH_READ_TIMEOUT = 30.0
+# 한 번의 일괄 검색에서 모든 쿼리의 재시도가 함께 쓰는 시간 예산 (초)
+SEARCH_RETRY_BUDGET = 60.0
+# 재시도 백오프 시작값과 상한 (초, 여기에 0~1초 지터를 더함)
+SEARCH_BACKOFF_INITIAL = 0.5
+SEARCH_BACKOFF_MAX = 4.0
+
+# RAG 서버에 동시에 보내는 검색 요청 상한 (한 턴의 네 카테고리는 한 번에, 여러 세션이 겹치면 대기)
+RAG_MAX_CONCURRENCY = 4
+RAG_SEMAPHORE = asyncio.Semaphore(RAG_MAX_CONCURRENCY)
+
+# 모든 벡터 검색이 공유하는 HTTP 클라이언트 (keep-alive로 커넥션 재사용, 종료 시 aclose)
+# 대화 턴 사이 간격이 기본 keep-alive 만료(5초)보다 길어 유휴 커넥션을 30초간 유지
+RAG_CLIENT = httpx.AsyncClient(
+    timeout=httpx.Timeout(connect=10.0, read=SEARCH_READ_TIMEOUT, write=10.0, pool=10.0),
+    limits=httpx.Limits(max_keepalive_connections=16, max_connections=32, keepalive_expiry=30.0)
+)
+
+class TTLCache:
+    """최대 개수(LRU)와 유효 시간(TTL)을 함께 적용하는 간단한 캐시"""
+    
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()  # 키 → (만료 시각, 값)
+    
+    def get(self, key, default=None):
+        entry = self._data.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._data[key]
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+    
+    def set(self, key, value):
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+# 벡터 검색 결과 캐시 ((정규화된 쿼리, 카테고리, 개수) → 검색 결과, 10분 유지)
+SEARCH_RESULT_CACHE = TTLCache(maxsize=2000, ttl=600)
+
+# 진행 중인 RAG 검색 (같은 캐시 키의 동시 요청을 하나로 합침)
+INFLIGHT_SEARCHES: Dict[tuple, asyncio.Future] = {}
+
+# LLM 결과 캐시 사용 여부 (테스트 시 LLM_CACHE=0으로 끔)
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE", "1") != "0"
+
+# 프로필 추출 결과 캐시 ((프로필 요약, 정규화된 메시지) → 추출 결과)
+PROFILE_EXTRACTION_CACHE = TTLCache(maxsize=512, ttl=600)
+
+# 검색 쿼리 생성 캐시 (프로필 지문 → 카테고리별 쿼리)
+QUERY_CACHE = TTLCache(maxsize=512, ttl=600)
+
+# 의미 기반 검색 결과 캐시 설정 (벡터 DB와 같은 임베딩 모델, 코사인 유사도 임계값)
+SEMANTIC_CACHE_MODEL_NAME = "snunlp/KR-SBERT-V40K-klueNLI-augSTS"
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92"))
+SEMANTIC_CACHE_MAXSIZE = 1024
+
+class SemanticSearchCache:
+    """쿼리 임베딩이 충분히 비슷하면 이전 벡터 DB 검색 결과를 재사용하는 캐시"""
+    
+    def __init__(self, threshold: float, maxsize: int):
+        self.threshold = threshold
+        self.maxsize = maxsize
+        self._model = None
+        self._disabled = SentenceTransformer is None
+        self._load_lock = asyncio.Lock()
+        self._vectors = {}  # 카테고리 → 정규화된 쿼리 임베딩 행렬
+        self._sources = {}  # 카테고리 → 행별 검색 결과
+    
+    async def embed(self, queries: List[str]) -> list:
+        """쿼리 목록을 한 번의 forward pass로 임베딩 (모델은 첫 사용 시 한 번만 로드, 실패하면 캐시 비활성화)"""
+        if self._disabled:
+            return [None] * len(queries)
+        async with self._load_lock:
+            if self._model is None:
+                try:
+                    self._model = await asyncio.to_thread(self._load_model)
+                except Exception as e:
+                    logger.warning("⚠️ 의미 캐시 임베딩 모델 로드 실패 - 캐시 비활성화: %s", e)
+                    self._disabled = True
+                    return [None] * len(queries)
+        return list(await asyncio.to_thread(self._encode, queries))
+    
+    @staticmethod
+    def _load_model():
+        """임베딩 모델 로드 (GPU가 있으면 FP16 추론)"""
+        device = "cuda" if torch.cuda.is_available() else "cpu"
+        model = SentenceTransformer(SEMANTIC_CACHE_MODEL_NAME, device=device)
+        if device == "cuda":
+            model.half()
+        logger.info("✅ 의미 캐시 임베딩 모델 로드 완료 (device: %s)", device)
+        return model
+    
+    def _encode(self, queries: List[str]):
+        """한 턴의 쿼리를 한 배치로 인코딩 (autograd 추적 없이)"""
+        with torch.inference_mode():
+            return self._model.encode(
+                queries, batch_size=len(queries), convert_to_numpy=True, normalize_embeddings=True
+            )
+    
+    def lookup(self, vector, category: str, top_k: int) -> Optional[List[Dict]]:
+        """임베딩이 충분히 비슷한 이전 검색 결과 반환 (없으면 None)"""
+        vectors = self._vectors.get(category)
+        if vector is None or vectors is None:
+            return None
+        
+        scores = vectors @ vector
+        best = int(scores.argmax())
+        sources = self._sources[category][best]
+        if scores[best] >= self.threshold and len(sources) >= top_k:
+            logger.debug("⚡ 의미 캐시 적중 (유사도 %.3f)", scores[best])
+            return sources[:top_k]
+        return None
+    
+    def add(self, category: str, vector, sources: List[Dict]):
+        if vector is None:
+            return
+        vectors = self._vectors.get(category)
+        if vectors is None:
+            self._vectors[category] = vector[None, :]
+            self._sources[category] = [sources]
+            return
+        # 최대 개수를 넘으면 가장 오래된 항목부터 제거
+        self._vectors[category] = np.vstack([vectors, vector])[-self.maxsize:]
+        self._sources[category] = (self._sources[category] + [sources])[-self.maxsize:]
+
+SEARCH_CACHE = SemanticSearchCache(SEMANTIC_CACHE_THRESHOLD, SEMANTIC_CACHE_MAXSIZE)
+
+# 대화 기록이 이 길이를 넘으면 오래된 기록을 요약 한 건으로 압축
+HISTORY_MAX_ENTRIES = 8
+# 압축 후 원문 그대로 유지할 최근 기록 수
+HISTORY_KEEP_RECENT = 4
+# 요약 기록의 최대 길이
+HISTORY_SUMMARY_MAX_CHARS = 300
+
+def compact_history(conversation_history: List[Dict]) -> List[Dict]:
+    """오래된 대화를 사용자 발화 위주의 요약 한 건으로 접고 최근 기록만 유지"""
+    if len(conversation_history) <= HISTORY_MAX_ENTRIES:
+        return conversation_history
+    
+    older = conversation_history[:-HISTORY_KEEP_RECENT]
+    # 이전 요약이 있으면 이어서 요약 (사용자 발화만 남기고 긴 일정 응답은 버림)
+    # 길이를 넘으면 가장 최근 발화가 남도록 앞부분을 잘라냄
+    parts = [msg["message"] for msg in older if msg["role"] in ("summary", "user")]
+    text = " ".join(" / ".join(parts).split())
+    if len(text) > HISTORY_SUMMARY_MAX_CHARS:
+        text = "…" + text[-(HISTORY_SUMMARY_MAX_CHARS - 1):]
+    summary = {
+        "role": "summary",
+        "message": text,
+        "timestamp": older[-1]["timestamp"]
+    }
+    return [summary] + conversation_history[-HISTORY_KEEP_RECENT:]
+
 # 프로필 수집 노드
 async def profile_collector_node(state: GraphState) -> GraphState:
     """사용자 프로필 수집 및 업데이트"""
     user_message = state["user_message"]
-    conversation_history = state.get("conversation_history", [])
     current_profile = state.get("user_profile", UserProfile())
     
-    # 대화 기록에 사용자 메시지 추가
-    conversation_history.append({
+    # 대화 기록에 사용자 메시지 추가 (길어진 기록은 요약으로 압축해 상태 크기 유지)
+    conversation_history = compact_history(state.get("conversation_history", []) + [{
             "role": "user", 
             "message": user_message,
             "timestamp": datetime.now().isoformat()
-        })
+        }])
         
     # 프로필 정보 추출
+    # 이미 일정 생성이 가능한 프로필이면 추출과 동시에 현재 프로필로 검색을 미리 시작
+    # (추출 후 프로필이 제자리에서 바뀌므로 검색에는 복사본을 넘김)
+    prefetch = None
+    if is_profile_sufficient(current_profile):
+        prefetch_profile = UserProfile(**current_profile.to_dict())
+        prefetch = asyncio.create_task(parallel_search_all({**state, "user_profile": prefetch_profile}))
+    
     profile_info = await extract_profile_info(user_message, current_profile)
-    print(f"🔍 추출된 프로필 정보: {profile_info}")
+    logger.debug("🔍 추출된 프로필 정보: %s", profile_info)
     
     # 프로필 업데이트
     updated_profile = update_profile(current_profile, profile_info)
-    print(f"📝 업데이트된 프로필: {updated_profile.get_summary()}")
+    logger.debug("📝 업데이트된 프로필: %s", updated_profile.get_summary())
     
     # 프로필이 충분한지 확인
     profile_ready = is_profile_sufficient(updated_profile)
     
+    # 검색에 영향을 주는 필드가 그대로면 미리 시작한 검색 결과를 사용, 아니면 취소
+    search_results = {}
+    if prefetch:
+        if profile_ready and updated_profile.fingerprint() == prefetch_profile.fingerprint():
+            search_results = await prefetch
+            logger.debug("⚡ 미리 시작한 검색 결과 사용")
+        else:
+            prefetch.cancel()
+            logger.debug("🔄 프로필 변경 - 미리 시작한 검색 취소")
+    
     if not profile_ready:
         # 추가 정보 수집 응답 생성
         response = await generate_info_collection_response(updated_profile, user_message, conversation_history)
@@ -121,7 +395,6 @@ async def profile_collector_node(state: GraphState) -> GraphState:
         })
         
         return {
-            **state,
             "conversation_history": conversation_history,
             "user_profile": updated_profile,
             "final_response": response,
@@ -129,10 +402,11 @@ async def profile_collector_node(state: GraphState) -> GraphState:
         }
     
     return {
-        **state,
         "conversation_history": conversation_history,
         "user_profile": updated_profile,
-        "profile_ready": True
+        "profile_ready": True,
+        "search_prefetched": bool(search_results),
+        **search_results
     }
 
 # 숙박 에이전트 노드
@@ -168,33 +442,32 @@ async def hotel_agent_node(state: GraphState) -> GraphState:
     
     try:
         # 쿼리 생성
-        response = await hotel_llm.ainvoke(prompt)
+        response = await shared_llm.ainvoke(prompt)
         search_query = response.content.strip()
-        print(f"🏨 숙박 에이전트 쿼리: '{search_query}'")
+        logger.debug("🏨 숙박 에이전트 쿼리: '%s'", search_query)
         
         # 벡터 DB 검색
         hotel_results = await search_vector_db(search_query, "hotel")
         
         # 검색 결과 디버깅
-        print(f"🏨 숙박 검색 결과 ({len(hotel_results)}개):")
-        for i, result in enumerate(hotel_results[:2]):  # 상위 2개만 출력
-            print(f"🧪 결과 구조: {list(result.keys()) if result else 'None'}")
-            name = result.get('name', '이름없음')
-            address = result.get('address', '주소없음')
-            category = result.get('category', '카테고리없음')
-            print(f"   {i+1}. {name}")
-            print(f"      주소: {address[:50]}{'...' if len(address) > 50 else ''}")
-            print(f"      카테고리: {category}")
+        logger.debug("🏨 숙박 검색 결과 (%s개):", len(hotel_results))
+        if logger.isEnabledFor(logging.DEBUG):
+            for i, result in enumerate(hotel_results[:2]):  # 상위 2개만 출력
+                logger.debug("🧪 결과 구조: %s", list(result.keys()) if result else 'None')
+                name = result.get('name', '이름없음')
+                address = result.get('address', '주소없음')
+                category = result.get('category', '카테고리없음')
+                logger.debug("   %s. %s", i + 1, name)
+                logger.debug("      주소: %s%s", address[:50], '...' if len(address) > 50 else '')
+                logger.debug("      카테고리: %s", category)
         
         return {
-            **state,
             "hotel_results": hotel_results
         }
         
     except Exception as e:
-        print(f"❌ 숙박 에이전트 오류: {e}")
+        logger.error("❌ 숙박 에이전트 오류: %s", e)
         return {
-            **state,
             "hotel_results": []
         }
 
@@ -229,32 +502,31 @@ async def travel_agent_node(state: GraphState) -> GraphState:
 검색 쿼리:"""
     
     try:
-        response = await travel_llm.ainvoke(prompt)
+        response = await shared_llm.ainvoke(prompt)
         search_query = response.content.strip()
-        print(f"🎯 관광 에이전트 쿼리: '{search_query}'")
+        logger.debug("🎯 관광 에이전트 쿼리: '%s'", search_query)
         
         travel_results = await search_vector_db(search_query, "travel")
         
         # 검색 결과 디버깅
-        print(f"🎯 관광 검색 결과 ({len(travel_results)}개):")
-        for i, result in enumerate(travel_results[:2]):  # 상위 2개만 출력
-            print(f"🧪 결과 구조: {list(result.keys()) if result else 'None'}")
-            name = result.get('name', '이름없음')
-            address = result.get('address', '주소없음')
-            category = result.get('category', '카테고리없음')
-            print(f"   {i+1}. {name}")
-            print(f"      주소: {address[:50]}{'...' if len(address) > 50 else ''}")
-            print(f"      카테고리: {category}")
+        logger.debug("🎯 관광 검색 결과 (%s개):", len(travel_results))
+        if logger.isEnabledFor(logging.DEBUG):
+            for i, result in enumerate(travel_results[:2]):  # 상위 2개만 출력
+                logger.debug("🧪 결과 구조: %s", list(result.keys()) if result else 'None')
+                name = result.get('name', '이름없음')
+                address = result.get('address', '주소없음')
+                category = result.get('category', '카테고리없음')
+                logger.debug("   %s. %s", i + 1, name)
+                logger.debug("      주소: %s%s", address[:50], '...' if len(address) > 50 else '')
+                logger.debug("      카테고리: %s", category)
         
         return {
-            **state,
             "travel_results": travel_results
         }
         
     except Exception as e:
-        print(f"❌ 관광 에이전트 오류: {e}")
+        logger.error("❌ 관광 에이전트 오류: %s", e)
         return {
-            **state,
             "travel_results": []
         }
 
@@ -289,32 +561,31 @@ async def food_agent_node(state: GraphState) -> GraphState:
 검색 쿼리:"""
     
     try:
-        response = await food_llm.ainvoke(prompt)
+        response = await shared_llm.ainvoke(prompt)
         search_query = response.content.strip()
-        print(f"🍽️ 음식 에이전트 쿼리: '{search_query}'")
+        logger.debug("🍽️ 음식 에이전트 쿼리: '%s'", search_query)
         
         food_results = await search_vector_db(search_query, "food")
         
         # 검색 결과 디버깅
-        print(f"🍽️ 음식 검색 결과 ({len(food_results)}개):")
-        for i, result in enumerate(food_results[:2]):  # 상위 2개만 출력
-            print(f"🧪 결과 구조: {list(result.keys()) if result else 'None'}")
-            name = result.get('name', '이름없음')
-            address = result.get('address', '주소없음')
-            category = result.get('category', '카테고리없음')
-            print(f"   {i+1}. {name}")
-            print(f"      주소: {address[:50]}{'...' if len(address) > 50 else ''}")
-            print(f"      카테고리: {category}")
+        logger.debug("🍽️ 음식 검색 결과 (%s개):", len(food_results))
+        if logger.isEnabledFor(logging.DEBUG):
+            for i, result in enumerate(food_results[:2]):  # 상위 2개만 출력
+                logger.debug("🧪 결과 구조: %s", list(result.keys()) if result else 'None')
+                name = result.get('name', '이름없음')
+                address = result.get('address', '주소없음')
+                category = result.get('category', '카테고리없음')
+                logger.debug("   %s. %s", i + 1, name)
+                logger.debug("      주소: %s%s", address[:50], '...' if len(address) > 50 else '')
+                logger.debug("      카테고리: %s", category)
         
         return {
-            **state,
             "food_results": food_results
         }
         
     except Exception as e:
-        print(f"❌ 음식 에이전트 오류: {e}")
+        logger.error("❌ 음식 에이전트 오류: %s", e)
         return {
-            **state,
             "food_results": []
         }
 
@@ -344,35 +615,49 @@ async def event_agent_node(state: GraphState) -> GraphState:
 검색 쿼리:"""
     
     try:
-        response = await event_llm.ainvoke(prompt)
+        response = await shared_llm.ainvoke(prompt)
         search_query = response.content.strip()
-        print(f"🎉 행사 에이전트 쿼리: '{search_query}'")
+        logger.debug("🎉 행사 에이전트 쿼리: '%s'", search_query)
         
         event_results = await search_vector_db(search_query, "event")
         
         # 검색 결과 디버깅
-        print(f"🎉 행사 검색 결과 ({len(event_results)}개):")
-        for i, result in enumerate(event_results[:2]):  # 상위 2개만 출력
-            print(f"🧪 결과 구조: {list(result.keys()) if result else 'None'}")
-            name = result.get('name', '이름없음')
-            address = result.get('address', '주소없음')
-            category = result.get('category', '카테고리없음')
-            print(f"   {i+1}. {name}")
-            print(f"      주소: {address[:50]}{'...' if len(address) > 50 else ''}")
-            print(f"      카테고리: {category}")
+        logger.debug("🎉 행사 검색 결과 (%s개):", len(event_results))
+        if logger.isEnabledFor(logging.DEBUG):
+            for i, result in enumerate(event_results[:2]):  # 상위 2개만 출력
+                logger.debug("🧪 결과 구조: %s", list(result.keys()) if result else 'None')
+                name = result.get('name', '이름없음')
+                address = result.get('address', '주소없음')
+                category = result.get('category', '카테고리없음')
+                logger.debug("   %s. %s", i + 1, name)
+                logger.debug("      주소: %s%s", address[:50], '...' if len(address) > 50 else '')
+                logger.debug("      카테고리: %s", category)
         
         return {
-            **state,
             "event_results": event_results
         }
         
     except Exception as e:
-        print(f"❌ 행사 에이전트 오류: {e}")
+        logger.error("❌ 행사 에이전트 오류: %s", e)
         return {
-            **state,
             "event_results": []
         }
 
+# 일정 프롬프트에 넣는 장소 설명의 최대 길이 (설명이 토큰 대부분을 차지)
+PLACE_DESC_MAX_CHARS = 120
+
+def format_place_rows(results: List[Dict], category: str) -> str:
+    """검색 결과를 '- 이름 | 주소 | 분류 | 설명' 형태의 간결한 행으로 변환"""
+    rows = []
+    for place in results:
+        desc = " ".join(str(place.get("content") or place.get("description") or "").split())
+        desc = textwrap.shorten(desc, width=PLACE_DESC_MAX_CHARS, placeholder="…") if desc else ""
+        rows.append(f"- {place.get('name', '')} | {place.get('address', '')} | {place.get('category') or category} | {desc}")
+    return "\n".join(rows) or "- 없음"
+
+# 최종 일정 스트리밍 전체에 허용하는 최대 시간 (초)
+RESPONSE_STREAM_TIMEOUT = 180.0
+
 # 응답 생성 노드
 async def response_generator_node(state: GraphState) -> GraphState:
     """최종 응답 생성 에이전트"""
@@ -384,36 +669,40 @@ async def response_generator_node(state: GraphState) -> GraphState:
     conversation_history = state.get("conversation_history", [])
     
     # 응답 생성 단계 디버깅
-    print(f"📋 최종 응답 생성 - 수집된 정보:")
-    print(f"   🏨 숙박: {len(hotel_results)}개")
-    print(f"   🎯 관광: {len(travel_results)}개") 
-    print(f"   🍽️ 음식: {len(food_results)}개")
-    print(f"   🎉 행사: {len(event_results)}개")
-    print(f"   💬 대화기록: {len(conversation_history)}개")
+    logger.debug("📋 최종 응답 생성 - 수집된 정보:")
+    logger.debug("   🏨 숙박: %s개", len(hotel_results))
+    logger.debug("   🎯 관광: %s개", len(travel_results)) 
+    logger.debug("   🍽️ 음식: %s개", len(food_results))
+    logger.debug("   🎉 행사: %s개", len(event_results))
+    logger.debug("   💬 대화기록: %s개", len(conversation_history))
+    
+    # 검색이 모두 실패했으면 근거 없는 일정을 만들지 않고 바로 안내
+    if state.get("search_degraded"):
+        logger.warning("⚠️ 검색 서버 응답 없음 - 일정 생성 생략")
+        final_response = "죄송합니다. 지금은 여행 정보 검색 서버에 연결할 수 없어 일정을 만들 수 없습니다. 잠시 후 다시 시도해주세요."
+        conversation_history.append({
+            "role": "assistant",
+            "message": final_response,
+            "timestamp": datetime.now().isoformat()
+        })
+        return {
+            "final_response": final_response,
+            "conversation_history": conversation_history
+        }
     
     # 대화 히스토리 요약
     history_summary = ""
     if conversation_history:
         recent_messages = conversation_history[-6:]  # 최근 6개 메시지만
-        history_summary = "\n".join([f"- {msg['role']}: {msg['message'][:100]}{'...' if len(msg['message']) > 100 else ''}" for msg in recent_messages])
-    
-    # 여행 기간별 결과 활용량 결정
-    duration = user_profile.duration or ""
-    import re
-    numbers = re.findall(r'\d+', duration.lower())
-    days = max(int(num) for num in numbers) if numbers else 3
-    
-    # 일수에 따른 정보 활용량 조정
-    if days <= 2:
-        hotel_count, tour_count, food_count, event_count = 3, 6, 5, 2
-    elif days <= 3:
-        hotel_count, tour_count, food_count, event_count = 3, 8, 6, 3
-    elif days <= 4:
-        hotel_count, tour_count, food_count, event_count = 4, 10, 8, 4
-    else:
-        hotel_count, tour_count, food_count, event_count = 5, 15, 10, 5
+        # 요약 기록은 이미 길이가 제한되어 있으므로 자르지 않음 (일반 메시지만 100자로 제한)
+        history_summary = "\n".join([
+            f"- {msg['role']}: {msg['message']}" if msg['role'] == "summary"
+            else f"- {msg['role']}: {msg['message'][:100]}{'...' if len(msg['message']) > 100 else ''}"
+            for msg in recent_messages
+        ])
     
-    print(f"📊 응답 생성용 정보 활용: 호텔 {hotel_count}개, 관광 {tour_count}개, 음식 {food_count}개, 이벤트 {event_count}개")
+    # 검색 단계에서 이미 여행 기간별 활용 개수만큼만 가져왔으므로 결과를 그대로 사용
+    logger.debug("📊 응답 생성용 정보 활용: 호텔 %s개, 관광 %s개, 음식 %s개, 행사 %s개", len(hotel_results), len(travel_results), len(food_results), len(event_results))
     
     prompt = f"""
 [시스템 메시지]
@@ -456,26 +745,37 @@ async def response_generator_node(state: GraphState) -> GraphState:
 **입력 정보:**
 - 사용자 프로필: {user_profile.get_summary()}
 - 최근 대화 내용: {history_summary or "첫 질문입니다"}
-- 숙박 정보: {json.dumps([{"name": h.get("name", ""), "address": h.get("address", ""), "description": str(h.get("content") or h.get("description") or "")} for h in hotel_results[:hotel_count]], ensure_ascii=False)}
-- 관광 정보: {json.dumps([{"name": t.get("name", ""), "address": t.get("address", ""), "description": str(t.get("content") or t.get("description") or "")} for t in travel_results[:tour_count]], ensure_ascii=False)}
-- 음식 정보: {json.dumps([{"name": f.get("name", ""), "address": f.get("address", ""), "description": str(f.get("content") or f.get("description") or "")} for f in food_results[:food_count]], ensure_ascii=False)}
+- 숙박 정보:
+{format_place_rows(hotel_results, "숙박")}
+- 관광 정보:
+{format_place_rows(travel_results, "관광")}
+- 음식 정보:
+{format_place_rows(food_results, "음식")}
+- 행사 정보:
+{format_place_rows(event_results, "행사")}
 
 **작성 지침:**
 - 사용자 성향과 대화 맥락을 반영해 **개인화된 일정**을 작성하세요.
 - 시간대별로 **1~2개 장소**를 추천하며, **아침/점심/저녁 식사 장소는 반드시 포함**하세요.
 - **관광 목적의 카페는 하루 1개까지만** 포함하세요.
+- 행사 정보는 사용자 성향과 동선에 맞을 때만 일정에 포함하세요.
 - **장소 설명은 제공된 정보만 사용**하고, 추측은 절대 하지 마세요.
 - **모든 장소는 정확한 이름과 주소를 반드시 포함**하여 작성하세요.
 - **1일차 오후에 숙소 체크인**, 모든 날은 **숙소에서 마무리**, 마지막 날은 **공항에서 마무리**되도록 하세요.
 """
     
+    logger.debug("📏 일정 프롬프트 길이: %s자", len(prompt))
+    
     try:
-        # 복잡한 일정 생성을 위한 넉넉한 타임아웃 (120초)
-        response = await asyncio.wait_for(
-            response_llm.ainvoke(prompt), 
-            timeout=120.0
-        )
-        final_response = response.content.strip()
+        # 스트리밍 전체에 대한 하드 타임아웃 (180초), 토큰이 도착하는 대로 누적
+        stream_start = time.perf_counter()
+        chunks = []
+        async with asyncio.timeout(RESPONSE_STREAM_TIMEOUT):
+            async for chunk in shared_llm.astream(prompt):
+                if not chunks:
+                    logger.debug("⚡ 첫 토큰 수신: %.2f초", time.perf_counter() - stream_start)
+                chunks.append(chunk.content)
+        final_response = "".join(chunks).strip()
         
         # 대화 기록에 응답 추가
         conversation_history.append({
@@ -485,29 +785,43 @@ async def response_generator_node(state: GraphState) -> GraphState:
         })
         
         return {
-            **state,
             "final_response": final_response,
             "conversation_history": conversation_history
         }
         
     except Exception as e:
-        print(f"❌ 응답 생성 오류: {e}")
+        logger.error("❌ 응답 생성 오류: %s", e)
         return {
-            **state,
             "final_response": "죄송합니다. 일정 생성 중 오류가 발생했습니다.",
             "conversation_history": conversation_history
         }
 
 # 유틸리티 함수들
+def parse_llm_json(content: str):
+    """LLM 응답에서 JSON 파싱 (```json 코드 블록 제거)"""
+    content = content.strip()
+    if "```json" in content:
+        content = content.split("```json")[1].split("```")[0].strip()
+    elif "```" in content:
+        content = content.split("```")[1].strip()
+    return orjson.loads(content)
+
 async def extract_profile_info(message: str, current_profile: UserProfile) -> Dict:
     """메시지에서 프로필 정보 추출"""
+    # 같은 프로필 상태에서 같은 메시지면 LLM 호출 없이 이전 추출 결과 재사용 (프로필이 바뀌면 키도 바뀜)
+    cache_key = (current_profile.get_summary(), " ".join(message.split()))
+    cached = PROFILE_EXTRACTION_CACHE.get(cache_key) if LLM_CACHE_ENABLED else None
+    if cached is not None:
+        logger.debug("⚡ 프로필 추출 캐시 적중")
+        return cached
+    
     prompt = f"""다음 사용자 메시지에서 제주도 여행 관련 정보를 추출해주세요.
 
 사용자 메시지: {message}
 
 현재 프로필: {current_profile.get_summary()}
 
-다음 정보를 JSON 형태로 추출해주세요 (없으면 null):
+다음 정보를 추출해주세요 (없으면 null):
 
 {{
     "travel_dates": "여행 날짜 (예: 8월 1일-3일, 다음주 금요일부터 등)",
@@ -528,37 +842,27 @@ async def extract_profile_info(message: str, current_profile: UserProfile) -> Di
 명시적으로 언급된 정보만 추출해주세요."""
 
     try:
-        response = await profile_llm.ainvoke(prompt)
-        content = response.content.strip()
-        
-        if "```json" in content:
-            content = content.split("```json")[1].split("```")[0].strip()
-        elif "```" in content:
-            content = content.split("```")[1].strip()
-            
-        return json.loads(content)
+        delta = await profile_extractor.ainvoke(prompt)
+        profile_info = delta.model_dump(exclude_none=True)
+        PROFILE_EXTRACTION_CACHE.set(cache_key, profile_info)
+        return profile_info
         
     except Exception as e:
-        print(f"❌ 프로필 추출 오류: {e}")
+        logger.error("❌ 프로필 추출 오류: %s", e)
         return {}
 
 def update_profile(current_profile: UserProfile, profile_info: Dict) -> UserProfile:
-    """프로필 업데이트"""
-    if profile_info.get("travel_dates"):
-        current_profile.travel_dates = profile_info["travel_dates"]
-    if profile_info.get("duration"):
-        current_profile.duration = profile_info["duration"]
-    if profile_info.get("group_type"):
-        current_profile.group_type = profile_info["group_type"]
-    if profile_info.get("interests"):
-        new_interests = profile_info["interests"]
-        for interest in new_interests:
-            if interest not in current_profile.interests:
-                current_profile.interests.append(interest)
-    if profile_info.get("budget"):
-        current_profile.budget = profile_info["budget"]
-    if profile_info.get("travel_region"):
-        current_profile.travel_region = profile_info["travel_region"]
+    """프로필 업데이트 (추출 결과에 값이 있는 필드만 반영)"""
+    for name, value in profile_info.items():
+        if not value:
+            continue
+        if name == "interests":
+            for interest in value:
+                if interest not in current_profile.interests:
+                    current_profile.interests.append(interest)
+            current_profile.invalidate_cache()
+        else:
+            setattr(current_profile, name, value)
         
     return current_profile
 
@@ -577,7 +881,7 @@ def is_profile_sufficient(profile: UserProfile) -> bool:
     # 최소 3개 이상의 정보가 있으면 검색 시작
     result = required_info_count >= 3
     
-    print(f"🧪 프로필 충분성 판단: {result} (필요정보: {required_info_count}/6)")
+    logger.debug("🧪 프로필 충분성 판단: %s (필요정보: %s/6)", result, required_info_count)
     return result
 
 async def generate_info_collection_response(profile: UserProfile, user_message: str, conversation_history: List[Dict] = None) -> str:
@@ -603,210 +907,214 @@ async def generate_info_collection_response(profile: UserProfile, user_message:
 - 현재 정보로도 추천 가능함을 안내"""
 
     try:
-        response = await profile_llm.ainvoke(prompt)
+        response = await shared_llm.ainvoke(prompt)
         return response.content.strip()
     except Exception as e:
-        print(f"❌ 정보 수집 응답 생성 오류: {e}")
+        logger.error("❌ 정보 수집 응답 생성 오류: %s", e)
         return "제주도 여행에 대해 더 자세히 알려주시면 더 좋은 추천을 드릴 수 있어요! 😊"
 
 async def search_vector_db(query: str, category: str = "", top_k: int = 5) -> List[Dict]:
     """벡터 DB 검색 (재시도 및 백오프 로직 포함)"""
-    max_retries = 3
-    base_timeout = 90.0  # 대용량 요청을 위한 충분한 타임아웃
+    return (await batch_search_vector_db([(query, category, top_k)]))[0]
+
+async def batch_search_vector_db(requests: List[Tuple[str, str, int]]) -> List[List[Dict]]:
+    """(쿼리, 카테고리, 개수) 목록을 한 번에 검색 - 캐시 확인 후 남은 쿼리만 일괄 임베딩하고 HTTP 요청"""
+    # 같은 쿼리는 세션과 관계없이 HTTP 요청 없이 재사용 (get/set 사이에 await가 없어 잠금 불필요)
+    cache_keys = [(query.strip().lower(), category, top_k) for query, category, top_k in requests]
+    results = [SEARCH_RESULT_CACHE.get(cache_key) for cache_key in cache_keys]
+    for (_, category, _), cached_sources in zip(requests, results):
+        if cached_sources is not None:
+            logger.debug("⚡ 검색 결과 캐시 적중 - %s (적중 %s / 미스 %s)", category, SEARCH_RESULT_CACHE.hits, SEARCH_RESULT_CACHE.misses)
+    
+    misses = [i for i, cached_sources in enumerate(results) if cached_sources is None]
+    if not misses:
+        return results
     
-    for attempt in range(max_retries):
+    # 표현만 다른 비슷한 쿼리로 이미 검색한 적이 있으면 HTTP 요청 생략 (임베딩은 한 번에, 비교는 카테고리별로)
+    vectors = await SEARCH_CACHE.embed([requests[i][0] for i in misses])
+    pending = []
+    for i, query_vector in zip(misses, vectors):
+        query, category, top_k = requests[i]
+        cached_sources = SEARCH_CACHE.lookup(query_vector, category, top_k)
+        if cached_sources is not None:
+            SEARCH_RESULT_CACHE.set(cache_keys[i], cached_sources)
+            results[i] = cached_sources
+        else:
+            pending.append((i, query_vector))
+    
+    # RAG 서버는 단건 /chat API만 있으므로 남은 쿼리는 공유 클라이언트로 동시에 요청 (재시도 예산은 함께 사용)
+    # 같은 쿼리가 이미 요청 중이면 새로 보내지 않고 그 결과를 함께 기다림 (한쪽이 취소돼도 요청은 유지)
+    deadline = time.monotonic() + SEARCH_RETRY_BUDGET
+    tasks = []
+    for i, query_vector in pending:
+        task = INFLIGHT_SEARCHES.get(cache_keys[i])
+        if task is None:
+            task = asyncio.ensure_future(fetch_vector_db(*requests[i], cache_keys[i], query_vector, deadline))
+            INFLIGHT_SEARCHES[cache_keys[i]] = task
+            task.add_done_callback(lambda done, key=cache_keys[i]: INFLIGHT_SEARCHES.pop(key, None))
+        else:
+            logger.debug("⚡ 진행 중인 동일 검색에 합류 - %s", requests[i][1])
+        tasks.append(task)
+    fetched = await asyncio.gather(*[asyncio.shield(task) for task in tasks])
+    for (i, _), sources in zip(pending, fetched):
+        results[i] = sources
+    return results
+
+async def fetch_vector_db(query: str, category: str, top_k: int, cache_key: tuple, query_vector, deadline: float) -> List[Dict]:
+    """RAG 서버에 검색 요청 (공유 마감 시각 안에서 지터를 섞은 지수 백오프로 재시도)"""
+    attempt = 0
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            logger.error("❌ %s 검색 시간 예산 소진 - 빈 결과 반환", category)
+            return []
+        
+        # 서버는 빠르게 응답하거나 죽어 있으므로 시도당 읽기 타임아웃은 고정 상한 (남은 예산 이내)
+        current_timeout = min(SEARCH_READ_TIMEOUT, remaining)
+        timeout_config = httpx.Timeout(
+            connect=min(10.0, remaining), 
+            read=current_timeout, 
+            write=10.0, 
+            pool=10.0
+        )
+        attempt += 1
+        
         try:
-            # 재시도마다 타임아웃 증가 (90초 → 180초 → 270초)
-            current_timeout = base_timeout * (attempt + 1)
-            timeout_config = httpx.Timeout(
-                connect=10.0, 
-                read=current_timeout, 
-                write=10.0, 
-                pool=10.0
-            )
+            logger.debug("🔄 벡터 검색 시도 %s - 타임아웃: %.1f초 (남은 예산 %.1f초)", attempt, current_timeout, remaining)
             
-            print(f"🔄 벡터 검색 시도 {attempt + 1}/{max_retries} - 타임아웃: {current_timeout}초")
+            # 여행 기간에 맞는 동적 검색 개수
+            search_payload = {
+                "query": query,
+                "top_k": top_k,  # 여행 기간별 동적 개수
+                "search_type": "mmr",  # 다양성을 고려한 MMR 검색
+                "diversity_lambda": 0.5  # 유사성:다양성 = 50:50
+            }
+            
+            async with RAG_SEMAPHORE:
+                response = await RAG_CLIENT.post(
+                    RAG_URL, content=orjson.dumps(search_payload), headers=JSON_HEADERS, timeout=timeout_config
+                )
             
-            async with httpx.AsyncClient(timeout=timeout_config) as client:
-                # 여행 기간에 맞는 동적 검색 개수
-                search_payload = {
-                    "query": query,
-                    "top_k": top_k,  # 여행 기간별 동적 개수
-                    "search_type": "mmr",  # 다양성을 고려한 MMR 검색
-                    "diversity_lambda": 0.5  # 유사성:다양성 = 50:50
-                }
+            if response.status_code == 200:
+                result = orjson.loads(response.content)
+                sources = result.get("sources", [])
+                processing_time = result.get("processing_time", 0)
                 
-                response = await client.post(RAG_URL, json=search_payload)
+                logger.debug("✅ 검색 성공 - %s개 결과, %.2f초 소요 (요청: %s개)", len(sources), processing_time, top_k)
                 
-                if response.status_code == 200:
-                    result = response.json()
-                    sources = result.get("sources", [])
-                    processing_time = result.get("processing_time", 0)
-                    
-                    print(f"✅ 검색 성공 - {len(sources)}개 결과, {processing_time:.2f}초 소요 (요청: {top_k}개)")
-                    
-                    # sources와 answer 모두 확인 (간단 버전)
-                    if sources and len(sources) > 0:
-                        print(f"🧪 첫 번째 결과: {sources[0].get('content', '')[:100]}...")
-                    
-                    return sources[:top_k]  # 요청한 개수만큼 반환
-                else:
-                    print(f"❌ HTTP 오류 - 상태코드: {response.status_code}")
-                    if attempt < max_retries - 1:
-                        await asyncio.sleep(2 ** attempt)  # 지수 백오프
-                        continue
-                    return []
+                # sources와 answer 모두 확인 (간단 버전)
+                if sources and len(sources) > 0:
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug("🧪 첫 번째 결과: %s...", sources[0].get('content', '')[:100])
+                    SEARCH_CACHE.add(category, query_vector, sources)
+                    SEARCH_RESULT_CACHE.set(cache_key, sources[:top_k])
                 
-        except httpx.ReadTimeout:
-            print(f"⏰ ReadTimeout 발생 ({current_timeout}초) - 시도 {attempt + 1}/{max_retries}")
-            if attempt < max_retries - 1:
-                print(f"🔄 {2 ** attempt}초 후 재시도...")
-                await asyncio.sleep(2 ** attempt)  # 지수 백오프: 1초, 2초, 4초
-                continue
-            else:
-                print("❌ 모든 재시도 실패 - 빈 결과 반환")
+                return sources[:top_k]  # 요청한 개수만큼 반환
+            
+            logger.error("❌ HTTP 오류 - 상태코드: %s", response.status_code)
+            # 4xx는 요청 자체의 문제라 다시 보내도 같은 결과이므로 재시도하지 않음
+            if response.status_code < 500:
                 return []
                 
+        except httpx.ReadTimeout:
+            logger.warning("⏰ ReadTimeout 발생 (%.1f초) - 시도 %s", current_timeout, attempt)
         except httpx.ConnectTimeout:
-            print(f"🔌 연결 타임아웃 - RAG 서버 연결 실패")
-            if attempt < max_retries - 1:
-                await asyncio.sleep(2 ** attempt)
-                continue
-            return []
-            
+            logger.warning("🔌 연결 타임아웃 - RAG 서버 연결 실패")
         except Exception as e:
-            print(f"❌ 벡터 DB 검색 오류 - {type(e).__name__}: {str(e)}")
-            if attempt < max_retries - 1:
-                await asyncio.sleep(2 ** attempt)
-                continue
+            logger.error("❌ 벡터 DB 검색 오류 - %s: %s", type(e).__name__, str(e))
+        
+        # 지터를 섞은 지수 백오프 (0.5초부터 최대 4초), 마감 시각을 넘기면 중단
+        backoff = min(SEARCH_BACKOFF_MAX, SEARCH_BACKOFF_INITIAL * 2 ** (attempt - 1) + random.uniform(0, 1))
+        if time.monotonic() + backoff >= deadline:
+            logger.error("❌ 재시도 시간 예산 부족 - 빈 결과 반환")
             return []
-    
-    return []
+        logger.debug("🔄 %.1f초 후 재시도...", backoff)
+        await asyncio.sleep(backoff)
 
-# 여행 기간별 검색 개수 계산
+# 여행 기간별 검색 개수 계산 (같은 기간 문자열은 다시 파싱하지 않음)
+@lru_cache(maxsize=256)
 def calculate_search_counts(duration: str) -> Dict[str, int]:
     """여행 기간에 따라 카테고리별 검색 개수 결정"""
     if not duration:
-        return {"hotel": 3, "tour": 8, "food": 6, "event": 3}
-    
-    duration_lower = duration.lower()
-    
-    # 숫자 추출 (1박2일, 3박4일 등)
-    import re
-    numbers = re.findall(r'\d+', duration_lower)
+        return DEFAULT_SEARCH_COUNTS
     
+    # 숫자 추출 (1박2일, 3박4일 등) - 가장 큰 숫자를 기준으로 (보통 총 일수)
+    numbers = DIGITS_RE.findall(duration)
     if numbers:
-        # 가장 큰 숫자를 기준으로 (보통 총 일수)
-        days = max(int(num) for num in numbers)
+        days = max(map(int, numbers))
     else:
-        # 텍스트 기반 판단
-        if any(word in duration_lower for word in ['당일', '하루']):
-            days = 1
-        elif any(word in duration_lower for word in ['1박', '2일']):
-            days = 2
-        elif any(word in duration_lower for word in ['2박', '3일']):
-            days = 3
-        elif any(word in duration_lower for word in ['3박', '4일']):
-            days = 4
-        elif any(word in duration_lower for word in ['4박', '5일']):
-            days = 5
-        else:
-            days = 3  # 기본값
-    
-    # 일수별 검색 개수 설정
-    if days <= 1:
-        counts = {"hotel": 3, "tour": 4, "food": 3, "event": 3}
-    elif days <= 2:
-        counts = {"hotel": 3, "tour": 6, "food": 5, "event": 3}
-    elif days <= 3:
-        counts = {"hotel": 4, "tour": 8, "food": 7, "event": 3}
-    elif days <= 4:
-        counts = {"hotel": 4, "tour": 12, "food": 10, "event": 3}
-    elif days <= 5:
-        counts = {"hotel": 5, "tour": 15, "food": 13, "event": 3}
-    else:  # 6일 이상
-        counts = {"hotel": 5, "tour": 18, "food": 16, "event": 3}
-    
-    print(f"📊 여행 기간 '{duration}' → {days}일 → 검색 개수: {counts}")
-    return counts
-
-# 큰 검색을 여러 번으로 분할하는 함수
-async def search_with_batching(query: str, category: str, total_count: int, batch_size: int = 6) -> List[Dict]:
-    """큰 검색 요청을 여러 번으로 나누어 처리 - 하지만 중복 문제로 인해 직접 처리 우선"""
-    print(f"🧪 [BATCH_DEBUG] {category}: total_count={total_count}, batch_size={batch_size}")
-    
-    # 중복 문제를 피하기 위해 가능하면 직접 처리 (타임아웃 증가로 20개까지 가능)
-    if total_count <= 20:  # 20개까지는 분할 안함
-        print(f"🧪 [BATCH_DEBUG] {category}: 중복 방지 - 직접 처리 (≤20개)")
-        return await search_vector_db(query, category, top_k=total_count)
-    
-    print(f"🔄 {category} 대량 검색: {total_count}개를 {batch_size}개씩 나누어 처리")
-    print(f"🧪 [BATCH_DEBUG] {category}: 분할 처리 시작!")
-    
-    all_results = []
-    batches_needed = (total_count + batch_size - 1) // batch_size  # 올림 계산
+        # 숫자가 없으면 텍스트 기반 판단
+        days = 1 if any(word in duration for word in ['당일', '하루']) else 3
     
-    for batch_num in range(batches_needed):
-        try:
-            current_batch_size = min(batch_size, total_count - len(all_results))
-            print(f"📝 {category} 배치 {batch_num + 1}/{batches_needed}: {current_batch_size}개 요청")
-            
-            # 배치별로 약간 다른 쿼리로 다양성 확보
-            if batch_num == 0:
-                batch_query = query
-            elif batch_num == 1:
-                batch_query = query.replace("추천", "명소 리스트")
-            else:
-                batch_query = query.replace("추천", f"베스트 {batch_num + 1}")
-            
-            batch_results = await search_vector_db(batch_query, f"{category}_batch{batch_num+1}", top_k=current_batch_size)
-            
-            # 중복 제거 (이름 기준)
-            existing_names = {result.get('name', '') for result in all_results}
-            new_results = [result for result in batch_results if result.get('name', '') not in existing_names]
-            
-            all_results.extend(new_results)
-            print(f"✅ {category} 배치 {batch_num + 1} 완료: {len(new_results)}개 추가 (중복 제거 후)")
-            
-            # 목표 달성 시 중단
-            if len(all_results) >= total_count:
-                break
-            
-            # 절반 이상 확보했고 타임아웃 위험이 있으면 조기 종료
-            if len(all_results) >= total_count // 2 and batch_num >= 2:
-                print(f"🎯 {category}: 충분한 결과 확보 ({len(all_results)}개) - 조기 완료")
-                break
-                
-            # 서버 부하 방지를 위한 대기 (더 길게)
-            if batch_num < batches_needed - 1:
-                await asyncio.sleep(2.0)
-                
-        except Exception as e:
-            print(f"❌ {category} 배치 {batch_num + 1} 실패: {e}")
-            continue
+    # 일수별 검색 개수 설정 (6일 이상은 6일 기준)
+    counts = SEARCH_COUNTS_BY_DAYS[min(max(days, 1), 6)]
     
-    final_results = all_results[:total_count]  # 요청한 개수만큼만 반환
-    print(f"🎯 {category} 최종 결과: {len(final_results)}개 (목표: {total_count}개)")
-    return final_results
+    logger.debug("📊 여행 기간 '%s' → %s일 → 검색 개수: %s", duration, days, counts)
+    return counts
 
-# 병렬 검색 기능 (여행 기간별 최적화)
-async def parallel_search_all(state: GraphState) -> GraphState:
-    """모든 카테고리를 병렬로 검색 (여행 기간별 개수 최적화)"""
-    user_profile = state["user_profile"]
-    
-    # 여행 기간에 따른 검색 개수 결정
-    search_counts = calculate_search_counts(user_profile.duration)
-    
-    # 각 카테고리별 LLM 기반 맞춤형 쿼리 생성 (세밀한 프롬프트 반영)
-    print("🔍 각 카테고리별 맞춤형 쿼리 생성 중...")
-    
-    async def generate_hotel_query(profile):
-        """숙박 검색 쿼리 생성 (개별 에이전트 프롬프트 사용)"""
-        prompt = f"""당신은 제주 여행자를 위한 **숙박 검색 쿼리 생성 전문가**입니다.
+# LLM 쿼리 생성이 실패한 카테고리에 쓰는 고정 키워드 쿼리 (프로필 값으로 채움)
+FALLBACK_QUERY_TEMPLATES = {
+    "hotel": "제주도 {region} {group} 숙소 호텔 추천",
+    "tour": "제주도 {region} {interests} 관광지 명소 추천",
+    "food": "제주도 {region} 맛집 음식점 추천",
+    "event": "제주도 {region} 축제 행사 추천"
+}
+
+def build_fallback_query(category: str, profile: UserProfile) -> str:
+    """프로필 값만으로 고정 키워드 검색 쿼리 생성"""
+    query = FALLBACK_QUERY_TEMPLATES[category].format(
+        region=profile.travel_region or "",
+        group=profile.group_type or "",
+        interests=" ".join(profile.interests)
+    )
+    return " ".join(query.split())
+
+# 쿼리 생성 시 사용자마다 달라지는 부분 (시스템 프롬프트는 고정해 프롬프트 캐시가 적중하도록 분리)
+QUERY_USER_PROMPT = "사용자 프로필: {profile_summary}"
+
+# 네 카테고리 검색 쿼리를 한 번에 생성하는 시스템 프롬프트 (카테고리별 지침은 개별 에이전트 프롬프트와 동일)
+ALL_QUERIES_PROMPT = """당신은 제주 여행자를 위한 **자연어 검색 쿼리 생성 전문가**입니다.
+
+사용자 메시지로 주어지는 프로필의 관심사, 여행 지역, 여행 기간, 동행자 정보를 참고해서 **벡터 DB 검색용 자연어 검색 쿼리 문장**을 카테고리별로 한 줄씩 만들어주세요.
+
+- hotel: 숙박 검색 쿼리. "제주도", "숙박", "호텔" 등 핵심 키워드 포함 (예: 감성 숙소, 자연 속 힐링, 오션뷰 숙소, 독채 숙소, 프라이빗 풀빌라)
+- tour: 관광지 검색 쿼리. "제주도", "관광지" 등 핵심 키워드 포함 (예: 자연 풍경, 감성적인 장소, 사진 찍기 좋은 곳, 활동적인 체험, 전시 공간)
+- food: 식당 또는 카페 검색 쿼리. "제주도", "맛집" 등 핵심 키워드 포함 (예: 감성적인 분위기, 현지인 맛집, 뷰 좋은 식당)
+- event: 행사/축제 검색 쿼리. "제주도", "행사", "이벤트" 등 핵심 키워드 포함 (예: 로맨틱한 분위기, 트렌디한 분위기, 소규모 행사)
+
+관심사가 있으면 자연스럽게 반영하고, 없으면 동행자 정보로 분위기를 유추하세요.
+    - **연인**이면 로맨틱하고 감성적인, 뷰가 좋은 곳
+    - **가족**이면 아이와 함께하기 좋고 편의시설이 갖춰진 넓은 곳
+    - **친구**면 트렌디하고 활기찬 핫플
+    - **혼자**면 조용하고 아늑한, 혼자 즐기기 좋은 곳
+
+쿼리는 자연스럽고 간결한 일반 검색어 문장이어야 합니다 (SQL이나 코드가 아님).
+다른 설명 없이 다음 JSON 형식으로만 출력하세요:
+{"hotel": "...", "tour": "...", "food": "...", "event": "..."}"""
+
+def query_messages(system_prompt: str, profile: UserProfile) -> list:
+    """고정 시스템 프롬프트 + 프로필만 담은 사용자 메시지"""
+    return [
+        SystemMessage(content=system_prompt),
+        HumanMessage(content=QUERY_USER_PROMPT.format(profile_summary=profile.get_summary()))
+    ]
+
+async def generate_all_queries(profile: UserProfile) -> Dict[str, str]:
+    """한 번의 LLM 호출로 네 카테고리 검색 쿼리 생성 (실패하면 빈 딕셔너리)"""
+    try:
+        response = await shared_llm.ainvoke(query_messages(ALL_QUERIES_PROMPT, profile))
+        queries = parse_llm_json(response.content)
+        return {category: query.strip() for category, query in queries.items() if isinstance(query, str) and query.strip()}
+    except Exception as e:
+        logger.error("❌ 통합 쿼리 생성 오류: %s", e)
+        return {}
 
-사용자 프로필 정보를 참고해, 사용자의 관심사, 여행 지역, 여행 기간 정보를 바탕으로 **벡터 DB에서 숙박을 검색하기 위한 자연어 검색 쿼리 문장 한 줄**을 생성해주세요.
+# 카테고리별 검색 쿼리 생성 시스템 프롬프트 (통합 쿼리 JSON에서 빠진 카테고리를 보완할 때 사용)
+CATEGORY_QUERY_PROMPTS = {
+    # 숙박
+    "hotel": """당신은 제주 여행자를 위한 **숙박 검색 쿼리 생성 전문가**입니다.
 
-사용자 프로필: {profile.get_summary()}
+사용자 프로필 정보를 참고해, 사용자의 관심사, 여행 지역, 여행 기간 정보를 바탕으로 **벡터 DB에서 숙박을 검색하기 위한 자연어 검색 쿼리 문장 한 줄**을 생성해주세요.
 
 쿼리에는 "제주도", "숙박", "호텔" 등 핵심 키워드를 포함하고 자연스럽고 간결해야 합니다.
 
@@ -817,41 +1125,12 @@ async def parallel_search_all(state: GraphState) -> GraphState:
     - **친구**면 여러 명이 함께 묵을 수 있는 트렌디한 숙소나 감성 숙소
     - **혼자**면 조용하고 아늑한 1인 숙소나 자연과 가까운 힐링 공간
 
-검색 쿼리:"""
-        
-        response = await hotel_llm.ainvoke(prompt)
-        return response.content.strip()
-    
-    async def generate_event_query(profile):
-        """이벤트 검색 쿼리 생성 (개별 에이전트 프롬프트 사용)"""
-        prompt = f"""당신은 제주관광 전문 **자연어** **쿼리 생성 전문가**입니다.
-
-다음과 같은 사용자 프로필을 참고하여, 벡터 DB에서 행사나 축제 정보를 검색하기 위한 자연어 검색 쿼리 문장 한 줄을 만들어주세요.
-
-사용자 프로필: {profile.get_summary()}
-
-쿼리는 "제주도", "행사", "이벤트" 등 핵심 키워드를 포함하고 자연스럽고 간결해야 합니다.
-
-- 관심사가 있는 경우 그걸 자연스럽게 반영해. (예: 로맨틱한 분위기, 트렌디한 분위기, 소규모 행사 등)
-- 관심사가 없는 경우 동행자 정보나 지역을 바탕으로 자연스럽게 적절한 분위기나 스타일을 유추해줘.
-    - **연인**이면 로맨틱하거나 분위기 좋은 곳
-    - **가족**이면 다양한 연령대가 함께 즐기기 좋은 곳 
-    - **친구**면 활기차고 활동적인 분위기의 축제나 트렌디한 행사
-    - **혼자**면 조용히 즐길 수 있는 문화행사나 혼행객에게 인기 있는 소규모 지역 축제
-
-자연어 검색 쿼리 한 문장으로 출력해주세요:"""
-        
-        response = await event_llm.ainvoke(prompt)
-        return response.content.strip()
-    
-    async def generate_tour_query(profile):
-        """관광지 검색 쿼리 생성 (개별 에이전트 프롬프트 사용)"""
-        prompt = f"""당신은 제주관광 전문 **자연어** **쿼리 생성 전문가**입니다.
+검색 쿼리:""",
+    # 관광지
+    "tour": """당신은 제주관광 전문 **자연어** **쿼리 생성 전문가**입니다.
 
 다음과 같은 사용자 프로필에서 사용자가 입력한 관심사, 여행 지역, 동행자 정보를 참고해서 **벡터 DB에서 관광지 정보를 검색하기 위한 자연어 검색 쿼리 문장 한 줄**을 만들어주세요.
 
-사용자 프로필: {profile.get_summary()}
-
 쿼리는 "제주도", "관광지" 등 핵심 키워드를 포함하고 자연스럽고 간결해야 합니다.
 
 - 관심사가 있는 경우 그걸 자연스럽게 반영해. (예: 자연 풍경, 감성적인 장소, 사진 찍기 좋은 곳, 활동적인 체험, 전시 공간 등)
@@ -861,19 +1140,12 @@ async def parallel_search_all(state: GraphState) -> GraphState:
     - **친구**면 트렌디하고 재밌는 핫플
     - **혼자**면 조용히 걸을 수 있는 곳이나 분위기 있는 장소
 
-검색 쿼리:"""
-        
-        response = await travel_llm.ainvoke(prompt)
-        return response.content.strip()
-    
-    async def generate_food_query(profile):
-        """음식점 검색 쿼리 생성 (개별 에이전트 프롬프트 사용)"""  
-        prompt = f"""당신은 제주관광 전문 **자연어 쿼리 생성 전문가**입니다.
+검색 쿼리:""",
+    # 음식점
+    "food": """당신은 제주관광 전문 **자연어 쿼리 생성 전문가**입니다.
 
 다음 사용자 프로필에서 사용자가 알려준 지역, 관심사, 그리고 동행자 정보를 참고해서 **벡터 DB에서 식당 또는 카페 정보를 검색하기 위한 자연어 검색 쿼리 문장 한 줄**을 만들어주세요
 
-사용자 프로필: {profile.get_summary()}
-
 쿼리는 "제주도", "맛집" 등 핵심 키워드를 포함하고 자연스럽고 간결해야 합니다.
 
 - 관심사가 있는 경우 그걸 자연스럽게 반영합니다. (예: 감성적인 분위기, 현지인 맛집, 뷰 좋은 식당 등)
@@ -883,137 +1155,95 @@ async def parallel_search_all(state: GraphState) -> GraphState:
     - **친구**면 캐주얼하거나 트렌디한 맛집
     - **혼자**면 조용하고 혼밥하기 좋은 곳
 
-검색 쿼리:"""
-        
-        response = await food_llm.ainvoke(prompt)
-        return response.content.strip()
-    
-    # 모든 카테고리에 LLM 기반 맞춤형 쿼리 생성
-    hotel_query = await generate_hotel_query(user_profile)
-    tour_query = await generate_tour_query(user_profile)
-    food_query = await generate_food_query(user_profile)
-    event_query = await generate_event_query(user_profile)
-    
-    queries = {
-        "hotel": hotel_query,
-        "tour": tour_query,
-        "food": food_query,
-        "event": event_query
+검색 쿼리:""",
+    # 행사
+    "event": """당신은 제주관광 전문 **자연어** **쿼리 생성 전문가**입니다.
+
+다음과 같은 사용자 프로필을 참고하여, 벡터 DB에서 행사나 축제 정보를 검색하기 위한 자연어 검색 쿼리 문장 한 줄을 만들어주세요.
+
+쿼리는 "제주도", "행사", "이벤트" 등 핵심 키워드를 포함하고 자연스럽고 간결해야 합니다.
+
+- 관심사가 있는 경우 그걸 자연스럽게 반영해. (예: 로맨틱한 분위기, 트렌디한 분위기, 소규모 행사 등)
+- 관심사가 없는 경우 동행자 정보나 지역을 바탕으로 자연스럽게 적절한 분위기나 스타일을 유추해줘.
+    - **연인**이면 로맨틱하거나 분위기 좋은 곳
+    - **가족**이면 다양한 연령대가 함께 즐기기 좋은 곳 
+    - **친구**면 활기차고 활동적인 분위기의 축제나 트렌디한 행사
+    - **혼자**면 조용히 즐길 수 있는 문화행사나 혼행객에게 인기 있는 소규모 지역 축제
+
+자연어 검색 쿼리 한 문장으로 출력해주세요:"""
+}
+
+async def generate_category_queries(profile: UserProfile, categories: List[str]) -> Dict[str, object]:
+    """카테고리별 개별 프롬프트를 한 번의 abatch로 생성 (실패한 카테고리 값은 예외 객체)"""
+    prompts = [query_messages(CATEGORY_QUERY_PROMPTS[category], profile) for category in categories]
+    responses = await shared_llm.abatch(prompts, config={"max_concurrency": len(prompts)}, return_exceptions=True)
+    return {
+        category: response if isinstance(response, Exception) else response.content.strip()
+        for category, response in zip(categories, responses)
     }
+
+# 병렬 검색 기능 (여행 기간별 최적화)
+async def parallel_search_all(state: GraphState) -> GraphState:
+    """모든 카테고리를 병렬로 검색 (여행 기간별 개수 최적화)"""
+    # 프로필 수집 단계에서 이미 검색을 마쳤으면 결과를 그대로 사용
+    if state.get("search_prefetched"):
+        return {"search_prefetched": False}
     
-    print(f"🎯 생성된 맞춤형 쿼리들:")
-    for category, query in queries.items():
-        print(f"   {category}: '{query}'")
-    
-    print("🚀 순차 검색 시작 (동시 요청 문제 해결)...")
+    user_profile = state["user_profile"]
     
-    # 모든 카테고리를 순차 처리 (RAG 서버 동시 요청 제한)
-    categories = list(queries.items())
-    results = {}
+    # 여행 기간에 따른 검색 개수 결정
+    search_counts = calculate_search_counts(user_profile.duration)
     
-    # 1단계: hotel + tour 순차 검색 (동시 요청 문제 해결)
-    print("📋 1단계: 숙박 + 관광지 순차 검색")
-    for category, query in categories[:2]:  # hotel, tour
-        count = search_counts.get(category, 5)
-        print(f"📝 {category} 쿼리: '{query}' (검색 개수: {count}개)")
+    # 각 카테고리별 LLM 기반 맞춤형 쿼리 생성 (세밀한 프롬프트 반영)
+    logger.debug("🔍 각 카테고리별 맞춤형 쿼리 생성 중...")
+    # 검색에 영향을 주는 프로필 필드가 그대로면 이전에 만든 쿼리 재사용 (LLM 호출 생략)
+    profile_key = user_profile.fingerprint()
+    cached_queries = QUERY_CACHE.get(profile_key) if LLM_CACHE_ENABLED else None
+    if cached_queries is not None:
+        logger.debug("⚡ 검색 쿼리 캐시 적중")
+        queries = dict(cached_queries)
+    else:
+        # 네 카테고리 쿼리를 한 번의 LLM 호출로 생성
+        queries = await generate_all_queries(user_profile)
         
-        # 순차 처리로 변경
-        try:
-            result = await search_with_batching(query, category, count, batch_size=3)
-            results[category] = result
-            print(f"🎯 {category} 순차 완료: {len(result)}개 결과 (목표: {count}개)")
-        except Exception as e:
-            print(f"❌ {category} 순차 검색 실패: {e}")
-            results[category] = []
+        # JSON에 빠진 카테고리만 개별 프롬프트로 다시 생성 (실패한 카테고리는 기본 쿼리로 검색)
+        missing = [category for category in CATEGORY_QUERY_PROMPTS if category not in queries]
+        if missing:
+            logger.warning("⚠️ 개별 쿼리 생성으로 보완: %s", missing)
+            queries.update(await generate_category_queries(user_profile, missing))
         
-        # 각 검색 사이에 잠깐 대기
-        await asyncio.sleep(1.0)
+        # 네 쿼리가 모두 만들어졌을 때만 캐시
+        if not any(isinstance(query, Exception) for query in queries.values()):
+            QUERY_CACHE.set(profile_key, dict(queries))
     
-    # 더미 루프 (기존 코드 구조 유지)
-    for category, task in []:
-        try:
-            expected_count = search_counts.get(category, 5)
-            # 분할 처리 시간을 고려한 충분한 타임아웃 (배치수 * 최대시간)
-            batches_needed = (expected_count + 2) // 3  # 3개씩 분할
-            timeout = min(600.0, batches_needed * 150.0)  # 배치당 최대 150초  
-            
-            result = await asyncio.wait_for(task, timeout=timeout)
-            results[category] = result
-            print(f"🎯 {category} 최종 완료: {len(result)}개 결과 (목표: {expected_count}개)")
-        except asyncio.TimeoutError:
-            print(f"⏰ {category} 전체 타임아웃 ({timeout}초)")
-            # 타임아웃이 발생해도 task에서 부분 결과를 얻을 수 있는지 확인
-            try:
-                if hasattr(task, 'result') and not task.cancelled():
-                    partial_result = task.result()
-                    results[category] = partial_result
-                    print(f"🔄 {category} 부분 결과 확보: {len(partial_result)}개")
-                else:
-                    results[category] = []
-                    print(f"❌ {category} 부분 결과 없음 - 빈 결과로 대체")
-            except:
-                results[category] = []
-                print(f"❌ {category} 부분 결과 추출 실패 - 빈 결과로 대체")
-        except Exception as e:
-            print(f"❌ {category} 검색 실패: {e}")
-            results[category] = []
-    
-    # 잠깐 대기 (서버 부하 감소) - 더 길게 대기
-    await asyncio.sleep(5.0)
-    
-    # 2단계: food + event 순차 검색 (동시 요청 문제 해결)
-    print("📋 2단계: 음식점 + 이벤트 순차 검색")
-    for category, query in categories[2:]:  # food, event
+    requests = []
+    for category in CATEGORY_QUERY_PROMPTS:
+        query = queries[category]
+        if isinstance(query, Exception):
+            # LLM 호출 하나가 실패해도 해당 카테고리 검색은 고정 키워드 쿼리로 진행
+            query = build_fallback_query(category, user_profile)
+            logger.warning("⚠️ %s 쿼리 생성 실패, 기본 쿼리 사용: %s", category, query)
         count = search_counts.get(category, 5)
-        print(f"📝 {category} 쿼리: '{query}' (검색 개수: {count}개)")
-        
-        # 순차 처리로 변경
-        try:
-            result = await search_with_batching(query, category, count, batch_size=3)
-            results[category] = result
-            print(f"🎯 {category} 순차 완료: {len(result)}개 결과 (목표: {count}개)")
-        except Exception as e:
-            print(f"❌ {category} 순차 검색 실패: {e}")
-            results[category] = []
-        
-        # 각 검색 사이에 잠깐 대기
-        await asyncio.sleep(1.0)
+        logger.debug("📝 %s 쿼리: '%s' (검색 개수: %s개)", category, query, count)
+        requests.append((query, category, count))
     
-    # 더미 루프 (기존 코드 구조 유지)
-    for category, task in []:
-        try:
-            expected_count = search_counts.get(category, 5)
-            # 분할 처리 시간을 고려한 충분한 타임아웃 (배치수 * 최대시간)
-            batches_needed = (expected_count + 2) // 3  # 3개씩 분할
-            timeout = min(600.0, batches_needed * 150.0)  # 배치당 최대 150초
-            
-            result = await asyncio.wait_for(task, timeout=timeout)
+    # 생성된 쿼리들을 한 번의 배치 검색으로 처리
+    logger.debug("🚀 배치 검색 시작...")
+    results = {category: [] for category in CATEGORY_QUERY_PROMPTS}
+    try:
+        for (_, category, count), result in zip(requests, await batch_search_vector_db(requests)):
             results[category] = result
-            print(f"🎯 {category} 최종 완료: {len(result)}개 결과 (목표: {expected_count}개)")
-        except asyncio.TimeoutError:
-            print(f"⏰ {category} 전체 타임아웃 ({timeout}초)")
-            # 타임아웃이 발생해도 task에서 부분 결과를 얻을 수 있는지 확인
-            try:
-                if hasattr(task, 'result') and not task.cancelled():
-                    partial_result = task.result()
-                    results[category] = partial_result
-                    print(f"🔄 {category} 부분 결과 확보: {len(partial_result)}개")
-                else:
-                    results[category] = []
-                    print(f"❌ {category} 부분 결과 없음 - 빈 결과로 대체")
-            except:
-                results[category] = []
-                print(f"❌ {category} 부분 결과 추출 실패 - 빈 결과로 대체")
-        except Exception as e:
-            print(f"❌ {category} 검색 실패: {e}")
-            results[category] = []
+            logger.debug("🎯 %s 완료: %s개 결과 (목표: %s개)", category, len(result), count)
+    except Exception as e:
+        logger.error("❌ 배치 검색 실패: %s", e)
     
     return {
-        **state,
         "hotel_results": results.get("hotel", []),
         "travel_results": results.get("tour", []),
         "food_results": results.get("food", []),
-        "event_results": results.get("event", [])
+        "event_results": results.get("event", []),
+        # 모든 카테고리가 비었으면 RAG 서버 장애로 보고 응답 단계에서 LLM 호출을 생략
+        "search_degraded": not any(results.values())
     }
 
 # 조건부 라우팅 함수
@@ -1032,34 +1262,34 @@ def should_continue_to_response(state: GraphState) -> str:
 async def diagnose_rag_server() -> Dict:
     """RAG 서버 상태 및 성능 진단"""
     try:
-        print("🔍 RAG 서버 진단 시작...")
+        logger.info("🔍 RAG 서버 진단 시작...")
         
         timeout_config = httpx.Timeout(connect=5.0, read=10.0, write=5.0, pool=5.0)
-        async with httpx.AsyncClient(timeout=timeout_config) as client:
-            start_time = asyncio.get_event_loop().time()
-            
-            # 간단한 테스트 쿼리 (RAG 서버는 /chat 엔드포인트만 지원)
-            response = await client.post(
-                RAG_URL,  # 직접 /chat 엔드포인트 사용
-                json={"query": "제주도"}
-            )
-            
-            end_time = asyncio.get_event_loop().time()
-            response_time = end_time - start_time
-            
-            result = {
-                "status": "healthy" if response.status_code == 200 else "unhealthy",
-                "status_code": response.status_code,
-                "response_time": f"{response_time:.2f}초",
-                "server_url": RAG_URL
-            }
-            
-            if response.status_code == 200:
-                print(f"✅ RAG 서버 정상 - 응답시간: {response_time:.2f}초")
-            else:
-                print(f"⚠️ RAG 서버 응답 이상 - 상태코드: {response.status_code}")
-            
-            return result
+        start_time = asyncio.get_event_loop().time()
+        
+        # 간단한 테스트 쿼리 (RAG 서버는 /chat 엔드포인트만 지원)
+        response = await RAG_CLIENT.post(
+            RAG_URL,  # 직접 /chat 엔드포인트 사용
+            json={"query": "제주도"},
+            timeout=timeout_config
+        )
+        
+        end_time = asyncio.get_event_loop().time()
+        response_time = end_time - start_time
+        
+        result = {
+            "status": "healthy" if response.status_code == 200 else "unhealthy",
+            "status_code": response.status_code,
+            "response_time": f"{response_time:.2f}초",
+            "server_url": RAG_URL
+        }
+        
+        if response.status_code == 200:
+            logger.info("✅ RAG 서버 정상 - 응답시간: %.2f초", response_time)
+        else:
+            logger.warning("⚠️ RAG 서버 응답 이상 - 상태코드: %s", response.status_code)
+        
+        return result
             
     except Exception as e:
         error_result = {
@@ -1068,7 +1298,7 @@ async def diagnose_rag_server() -> Dict:
             "error_type": type(e).__name__,
             "server_url": RAG_URL
         }
-        print(f"❌ RAG 서버 진단 실패: {e}")
+        logger.error("❌ RAG 서버 진단 실패: %s", e)
         return error_result
 
 # LangGraph 설정
@@ -1110,7 +1340,21 @@ workflow.add_conditional_edges(
 # 응답 생성 후 종료
 workflow.add_edge("response_generator", END)
 
-# 메모리 설정 및 컴파일
+# 대화 상태 체크포인트를 저장할 SQLite 파일 (설정하지 않으면 프로세스 메모리에 보관)
+CHECKPOINT_DB = os.getenv("CHECKPOINT_DB")
+# SQLite 체크포인터 연결 (서버 시작 시 열고 종료 시 닫음)
+CHECKPOINT_STACK = AsyncExitStack()
+
+async def open_sqlite_checkpointer():
+    """CHECKPOINT_DB용 AsyncSqliteSaver 열기 (실행 중인 이벤트 루프 안에서만 생성 가능, 패키지가 없으면 None)"""
+    try:
+        from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+    except ImportError:
+        logger.warning("⚠️ langgraph-checkpoint-sqlite가 설치되지 않아 메모리 체크포인터를 사용합니다.")
+        return None
+    return await CHECKPOINT_STACK.enter_async_context(AsyncSqliteSaver.from_conn_string(CHECKPOINT_DB))
+
+# 메모리 설정 및 컴파일 (CHECKPOINT_DB가 있으면 서버 시작 시 SQLite 체크포인터로 다시 컴파일)
 memory = MemorySaver()
 graph = workflow.compile(checkpointer=memory)
 
@@ -1127,44 +1371,9 @@ class SmartJejuChatbot:
         config = {"configurable": {"thread_id": self.session_id}}
         
         try:
-            # 기존 상태 불러오기 (메모리에서)
-            try:
-                current_state = await self.graph.aget_state(config)
-                if current_state and current_state.values:
-                    # 기존 상태가 있으면 사용자 메시지만 업데이트
-                    state = current_state.values.copy()
-                    state["user_message"] = user_message
-                    print(f"🔄 기존 상태 불러옴 - 대화 기록: {len(state.get('conversation_history', []))}개")
-                else:
-                    # 기존 상태가 없으면 새로 생성
-                    state = {
-                        "user_message": user_message,
-                        "conversation_history": [],
-                        "user_profile": UserProfile(),
-                        "hotel_results": [],
-                        "travel_results": [],
-                        "food_results": [],
-                        "event_results": [],
-                        "final_response": "",
-                        "profile_ready": False
-                    }
-                    print(f"🆕 새로운 상태 생성")
-            except Exception as e:
-                print(f"⚠️ 상태 불러오기 실패, 새로 생성: {e}")
-                state = {
-                    "user_message": user_message,
-                    "conversation_history": [],
-                    "user_profile": UserProfile(),
-                    "hotel_results": [],
-                    "travel_results": [],
-                    "food_results": [],
-                    "event_results": [],
-                    "final_response": "",
-                    "profile_ready": False
-                }
-            
-            # 그래프 실행
-            result = await self.graph.ainvoke(state, config)
+            # 체크포인터가 thread_id로 이전 상태를 불러와 합치므로 이번 메시지만 입력
+            # (첫 대화면 노드들이 기본값으로 시작)
+            result = await self.graph.ainvoke({"user_message": user_message}, config)
             
             # 응답과 프로필 정보 반환
             response_text = result.get("final_response", "죄송합니다. 응답을 생성할 수 없습니다.")
@@ -1176,18 +1385,41 @@ class SmartJejuChatbot:
             }
             
         except Exception as e:
-            print(f"❌ 챗봇 실행 오류: {e}")
+            logger.error("❌ 챗봇 실행 오류: %s", e)
             return {
                 "response": "죄송합니다. 일시적인 오류가 발생했습니다. 다시 시도해주세요.",
                 "user_profile": UserProfile()
             }
+    
+    async def chat_stream(self, user_message: str, session_id: Optional[str] = None):
+        """일정 토큰을 생성되는 대로 전달하고 마지막에 최종 응답과 프로필을 전달"""
+        config = {"configurable": {"thread_id": session_id or self.session_id}}
+        
+        try:
+            async for chunk, metadata in self.graph.astream({"user_message": user_message}, config, stream_mode="messages"):
+                # 일정 생성 노드의 토큰만 전달 (프로필 추출 등 내부 LLM 호출은 제외)
+                if metadata.get("langgraph_node") == "response_generator" and chunk.content:
+                    yield {"type": "token", "content": chunk.content}
+            
+            # 정보 수집 응답처럼 스트리밍되지 않은 응답도 done 이벤트로 전달
+            state = (await self.graph.aget_state(config)).values
+            response_text = state.get("final_response", "죄송합니다. 응답을 생성할 수 없습니다.")
+            user_profile = state.get("user_profile", UserProfile())
+            
+        except Exception as e:
+            logger.error("❌ 챗봇 스트리밍 오류: %s", e)
+            response_text = "죄송합니다. 일시적인 오류가 발생했습니다. 다시 시도해주세요."
+            user_profile = UserProfile()
+        
+        yield {"type": "done", "response": response_text, "user_profile": user_profile}
 
 # FastAPI 서버 설정
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import ORJSONResponse, StreamingResponse
 
-app = FastAPI(title="🌴 LangGraph 제주도 멀티 에이전트 챗봇")
+# 응답 직렬화는 orjson으로 (한글 일정 텍스트를 ensure_ascii 이스케이프 없이 바로 UTF-8로)
+app = FastAPI(title="🌴 LangGraph 제주도 멀티 에이전트 챗봇", default_response_class=ORJSONResponse)
 
 # CORS 설정
 app.add_middleware(
@@ -1201,6 +1433,21 @@ app.add_middleware(
 # 전역 챗봇 인스턴스
 chatbot = SmartJejuChatbot()
 
+@app.on_event("startup")
+async def startup_event():
+    """CHECKPOINT_DB가 설정되어 있으면 SQLite 체크포인터를 열고 그래프를 다시 컴파일"""
+    if CHECKPOINT_DB:
+        saver = await open_sqlite_checkpointer()
+        if saver is not None:
+            chatbot.graph = workflow.compile(checkpointer=saver)
+            logger.info("💾 SQLite 체크포인터 사용: %s", CHECKPOINT_DB)
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """서버 종료 시 공유 벡터 검색 클라이언트, 체크포인트 DB 연결 정리 (로그 리스너는 atexit에서 정리)"""
+    await RAG_CLIENT.aclose()
+    await CHECKPOINT_STACK.aclose()
+
 class ChatRequest(BaseModel):
     content: str  # backend에서 'content' 필드로 전송
     session_id: str
@@ -1218,6 +1465,29 @@ class ChatResponse(BaseModel):
     analysis_confidence: float = 0.8
     timestamp: str
 
+def build_chat_response(response_text: str, profile: Optional[UserProfile], session_id: str) -> ChatResponse:
+    """챗봇 응답과 프로필로 ChatResponse 생성"""
+    # 프로필 정보와 완성도 (완성도는 프로필이 바뀐 턴에만 다시 계산)
+    profile_dict = {}
+    profile_completion = 0.0
+    if profile:
+        profile_dict = profile.to_dict()
+        profile_completion = profile.completion()
+    
+    # 더 많은 정보가 필요한지 판단
+    needs_more_info = profile_completion < 0.8
+    
+    return ChatResponse(
+        response=response_text,
+        session_id=session_id or "default",
+        needs_more_info=needs_more_info,
+        profile_completion=profile_completion,
+        follow_up_questions=[],
+        user_profile=profile_dict,
+        analysis_confidence=0.8,
+        timestamp=datetime.now().isoformat()
+    )
+
 @app.post("/chat", response_model=ChatResponse)
 async def chat_endpoint(request: ChatRequest):
     """채팅 엔드포인트"""
@@ -1227,42 +1497,10 @@ async def chat_endpoint(request: ChatRequest):
             chatbot.session_id = request.session_id
             
         result = await chatbot.chat(request.content)
-        
-        # 프로필 정보를 딕셔너리로 변환
-        profile_dict = {}
-        if result.get("user_profile"):
-            profile = result["user_profile"]
-            profile_dict = {
-                "travel_dates": profile.travel_dates,
-                "duration": profile.duration,
-                "group_type": profile.group_type,
-                "interests": profile.interests,
-                "budget": profile.budget,
-                "travel_region": profile.travel_region
-            }
-        
-        # 프로필 완성도 계산
-        profile_completion = 0.0
-        if profile_dict:
-            completed_fields = sum(1 for v in profile_dict.values() if v)
-            profile_completion = completed_fields / len(profile_dict)
-        
-        # 더 많은 정보가 필요한지 판단
-        needs_more_info = profile_completion < 0.8
-        
-        return ChatResponse(
-            response=result["response"],
-            session_id=request.session_id or "default",
-            needs_more_info=needs_more_info,
-            profile_completion=profile_completion,
-            follow_up_questions=[],
-            user_profile=profile_dict,
-            analysis_confidence=0.8,
-            timestamp=datetime.now().isoformat()
-        )
+        return build_chat_response(result["response"], result.get("user_profile"), request.session_id)
         
     except Exception as e:
-        print(f"❌ 채팅 오류: {e}")
+        logger.error("❌ 채팅 오류: %s", e)
         return ChatResponse(
             response="죄송합니다. 일시적인 오류가 발생했습니다. 다시 시도해주세요.",
             session_id=request.session_id or "default",
@@ -1274,6 +1512,19 @@ async def chat_endpoint(request: ChatRequest):
             timestamp=datetime.now().isoformat()
         )
 
+@app.post("/chat/stream")
+async def chat_stream_endpoint(request: ChatRequest):
+    """일정 토큰을 SSE로 스트리밍하는 채팅 엔드포인트 (마지막 done 이벤트에 /chat 응답과 같은 필드 포함)"""
+    session_id = request.session_id or chatbot.session_id
+    
+    async def event_stream():
+        async for event in chatbot.chat_stream(request.content, session_id):
+            if event["type"] == "done":
+                event = {"type": "done", **build_chat_response(event["response"], event["user_profile"], request.session_id).model_dump()}
+            yield b"data: " + orjson.dumps(event) + b"\n\n"
+    
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
 @app.get("/")
 async def root():
     return {"message": "🌴 LangGraph 기반 제주도 멀티 에이전트 챗봇 API"}
@@ -1300,19 +1551,15 @@ async def performance_tips():
     """ReadTimeout 문제 해결 팁"""
     return {
         "readtimeout_solutions": {
-            "1_retry_logic": "자동 재시도 (3회) + 지수 백오프",
+            "1_retry_logic": f"공유 시간 예산({SEARCH_RETRY_BUDGET:.0f}초) 안에서 재시도 + 지수 백오프({SEARCH_BACKOFF_INITIAL}초 → 최대 {SEARCH_BACKOFF_MAX}초, 지터 포함)",
             "2_parallel_search": "병렬 검색으로 전체 시간 단축",  
-            "3_timeout_escalation": "30초 → 60초 → 90초 점진적 증가",
+            "3_timeout_budget": f"시도당 읽기 타임아웃 {SEARCH_READ_TIMEOUT:.0f}초, 남은 예산이 더 짧으면 예산만큼만 대기",
             "4_performance_optimization": "similarity 검색 (MMR 대신)",
             "5_dynamic_count": "여행 기간별 동적 검색 개수 조정"
         },
         "smart_search_counts": {
-            "1_day": {"hotel": 3, "tour": 4, "food": 3, "event": 2},
-            "2_days": {"hotel": 3, "tour": 6, "food": 5, "event": 3},
-            "3_days": {"hotel": 4, "tour": 8, "food": 6, "event": 3},
-            "4_days": {"hotel": 4, "tour": 12, "food": 8, "event": 4},
-            "5_days": {"hotel": 5, "tour": 15, "food": 10, "event": 5},
-            "6+_days": {"hotel": 5, "tour": 18, "food": 12, "event": 6}
+            f"{days}{'_day' if days == 1 else '+_days' if days == max(SEARCH_COUNTS_BY_DAYS) else '_days'}": counts
+            for days, counts in SEARCH_COUNTS_BY_DAYS.items()
         },
         "benefits": {
             "comprehensive_itinerary": "여행 기간에 맞는 충분한 장소 정보",
@@ -1324,7 +1571,7 @@ async def performance_tips():
             "rag_server": "advanced_jeju_chatbot/api/main.py",
             "vector_db": "ChromaDB 인덱스 최적화 필요시 재구축",
             "llm_api": "Upstage Solar Pro API 응답 시간 모니터링",
-            "adaptive_timeout": "검색 개수에 따른 동적 타임아웃 조정"
+            "shared_deadline": "일괄 검색 전체가 하나의 재시도 예산을 공유"
         },
         "monitoring": {
             "health_check": "/health 엔드포인트 사용",
@@ -1340,4 +1587,12 @@ if __name__ == "__main__":
     print("📍 서버: http://localhost:8001")
     print("🔍 진단: http://localhost:8001/health")
     print("💡 성능 팁: http://localhost:8001/performance-tips")
-    uvicorn.run(app, host="0.0.0.0", port=8001)  # backend에서 8001 포트로 호출 
\ No newline at end of file
+    # 여러 워커는 대화 상태를 공유해야 하므로 SQLite 체크포인터(CHECKPOINT_DB)를 쓸 때만 허용
+    workers = int(os.getenv("UVICORN_WORKERS", "1")) if CHECKPOINT_DB else 1
+    # 워커가 하나면 이미 로드된 app 객체를 그대로 사용 (import 문자열을 넘기면 모듈이 한 번 더 로드됨)
+    # 여러 워커는 각 프로세스가 모듈을 직접 import해야 하므로 import 문자열 사용
+    # loop/http는 uvloop·httptools가 설치되어 있으면 자동으로 사용
+    uvicorn.run(
+        app if workers == 1 else "smart_chatbot:app",
+        host="0.0.0.0", port=8001, workers=workers, loop="auto", http="auto"
+    )  # backend에서 8001 포트로 호출 
\ No newline at end of file
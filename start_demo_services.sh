@@ -24,7 +24,7 @@ fi
 
 # 필요한 패키지 설치 확인
 echo "📦 필요한 패키지 확인 중..."
-pip install -q fastapi uvicorn python-dotenv langchain-upstage langgraph httpx
+pip install -q fastapi uvicorn python-dotenv langchain-upstage langgraph httpx orjson
 
 # RAG 서비스 확인 (포트 8002)
 echo "🔍 RAG 서비스 상태 확인 중..."